@@ -0,0 +1,55 @@
+"""Short-lived in-process cache for read-only query results.
+
+The Rust UI polls /graph, /sessions, /metrics and /projects with the same
+parameters every few seconds, so results are reused for a short TTL
+instead of re-querying SQLite on every poll.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Each entry carries an ETag computed once by `etag(value)` when it is
+    stored. Tagging the content rather than the store time means a client
+    revalidating with If-None-Match still gets a 304 after the entry is
+    refreshed, as long as the result has not changed.
+    """
+
+    def __init__(self, etag: Callable[[Any], str], maxsize: int = 256, ttl: float = 5.0):
+        self.etag = etag
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_call(self, key: Hashable, fn: Callable, *args) -> tuple[Any, str]:
+        """Return (value, etag) for key, calling fn(*args) on a miss.
+
+        The lock is not held while fn runs, so concurrent misses on the
+        same key may both query; the last one to finish wins.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._data.move_to_end(key)
+                return entry[1], entry[2]
+
+        value = fn(*args)
+        etag = self.etag(value)
+
+        with self._lock:
+            self._data[key] = (now, value, etag)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value, etag
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after new data is ingested)."""
+        with self._lock:
+            self._data.clear()
@@ -3,13 +3,16 @@
 Generates vector embeddings for messages using OpenAI text-embedding-3-small,
 stores them as BLOBs in SQLite, and computes cosine similarity at query time.
 """
+import hashlib
 import struct
 import threading
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
 
 import numpy as np
 
+from .embeddings_numba import sweep_capped
 from .queries import get_connection
 from . import llm
 
@@ -17,6 +20,22 @@ from . import llm
 _cache_lock = threading.Lock()
 _embedding_cache: Optional[dict] = None  # {message_ids: list[int], matrix: np.ndarray, model: str}
 
+# Per-query caches keyed by SHA-256 of the query text. The UI re-sends the
+# same phrase whenever a slider moves, so the embedding API call and the
+# similarity pass are skipped on repeats. Query vectors never go stale;
+# score maps are dropped whenever the embedding matrix changes. A score map
+# holds one entry per embedded message, so far fewer of them are kept.
+_QUERY_CACHE_SIZE = 512
+_SCORE_CACHE_SIZE = 16
+_query_vectors: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_query_scores: "OrderedDict[bytes, dict[int, float]]" = OrderedDict()
+
+# Node count above which uncapped proximity windows are expanded with NumPy
+_VECTOR_EDGES_MIN_NODES = 1024
+
+# Proximity edges as parallel (source_ids, target_ids, strengths) arrays
+EdgeArrays = tuple[np.ndarray, np.ndarray, np.ndarray]
+
 
 def _get_openai_client():
     """Get an OpenAI-compatible client for embeddings.
@@ -48,6 +67,25 @@ def _invalidate_cache():
     global _embedding_cache
     with _cache_lock:
         _embedding_cache = None
+        _query_scores.clear()
+
+
+def _lru_get(cache: OrderedDict, key: bytes):
+    """Look up key in an LRU dict, marking it recently used."""
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache: OrderedDict, key: bytes, value, maxsize: int) -> None:
+    """Store value in an LRU dict, evicting the oldest entries past maxsize."""
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > maxsize:
+            cache.popitem(last=False)
 
 
 def _ensure_table():
@@ -288,18 +326,27 @@ def search_by_query(query_text: str) -> dict[int, float]:
         query_text: The search query.
 
     Returns:
-        dict mapping message_id -> similarity score (0.0 to 1.0)
+        dict mapping message_id -> similarity score (0.0 to 1.0).
+        Results are cached per query; callers must not mutate the dict.
     """
-    # Embed the query
-    query_vectors = embed_texts([query_text])
-    if not query_vectors:
-        return {}
-
-    query_vec = np.array(query_vectors[0], dtype=np.float32)
-    # Normalize query vector
-    norm = np.linalg.norm(query_vec)
-    if norm > 0:
-        query_vec = query_vec / norm
+    key = hashlib.sha256(query_text.encode("utf-8")).digest()
+    cached = _lru_get(_query_scores, key)
+    if cached is not None:
+        return cached
+
+    query_vec = _lru_get(_query_vectors, key)
+    if query_vec is None:
+        # Embed the query
+        query_vectors = embed_texts([query_text])
+        if not query_vectors:
+            return {}
+
+        query_vec = np.array(query_vectors[0], dtype=np.float32)
+        # Normalize query vector
+        norm = np.linalg.norm(query_vec)
+        if norm > 0:
+            query_vec = query_vec / norm
+        _lru_put(_query_vectors, key, query_vec, _QUERY_CACHE_SIZE)
 
     # Load cached embeddings
     cache = _load_cache()
@@ -323,6 +370,11 @@ def search_by_query(query_text: str) -> dict[int, float]:
             score = 0.5
         scores[msg_id] = score
 
+    # Skip caching if new embeddings were saved while we were scoring
+    with _cache_lock:
+        still_current = cache is _embedding_cache
+    if still_current:
+        _lru_put(_query_scores, key, scores, _SCORE_CACHE_SIZE)
     return scores
 
 
@@ -335,12 +387,12 @@ def compute_proximity_edges(
     """Compute score-proximity edges: link nodes whose similarity scores
     to a query phrase are within `delta` of each other.
 
-    Algorithm: O(n log n) sort + O(n * window_size) sliding window.
-
     Args:
         query_text: The concept to score nodes against (e.g. "breakthrough").
         delta: Maximum score difference to create an edge.
-        max_edges: Hard cap on total returned edges.
+        max_edges: Hard cap on total returned edges. Edges come out in sweep
+            order (ascending score, nearest neighbor first), and a capped
+            result is always a prefix of the uncapped one.
         max_neighbors: Per-node edge cap (0 = unlimited). When > 0, each node
             connects to at most this many nearest neighbors by score.
 
@@ -351,54 +403,210 @@ def compute_proximity_edges(
     if not scores:
         return {"edges": [], "scores": {}, "count": 0}
 
-    # Sort nodes by score ascending for sliding window
+    edges = proximity_edges_from_scores(scores, delta, max_edges, max_neighbors)
+    return {
+        "edges": edges,
+        "scores": scores,
+        "count": len(edges),
+    }
+
+
+def proximity_edge_arrays(
+    scores: dict[int, float],
+    delta: float = 0.1,
+    max_edges: int = 100_000,
+    max_neighbors: int = 0,
+) -> EdgeArrays:
+    """Same edges as proximity_edges_from_scores, as parallel arrays.
+
+    Returns (source_ids, target_ids, strengths). The NumPy and numba paths
+    produce these directly, so no per-edge tuple is ever built; the arrays
+    also pickle cheaply back from a worker process.
+    """
+    if max_neighbors <= 0 and len(scores) >= _VECTOR_EDGES_MIN_NODES:
+        return _window_edge_arrays(scores, delta, max_edges)
+    if max_neighbors > 0 and sweep_capped is not None:
+        ordered = sorted(scores.items(), key=lambda x: x[1])
+        return _capped_edge_arrays(
+            [node_id for node_id, _ in ordered], [score for _, score in ordered],
+            delta, max_edges, max_neighbors,
+        )
+
+    edges = proximity_edges_from_scores(scores, delta, max_edges, max_neighbors)
+    if not edges:
+        return _empty_edge_arrays()
+    src, tgt, strength = zip(*edges)
+    return _id_array(src), _id_array(tgt), np.asarray(strength, dtype=np.float64)
+
+
+def proximity_edges_from_scores(
+    scores: dict[int, float],
+    delta: float = 0.1,
+    max_edges: int = 100_000,
+    max_neighbors: int = 0,
+) -> list[tuple[int, int, float]]:
+    """Link nodes whose scores are within `delta` of each other.
+
+    Pure CPU work with no DB or cache access, so it can run in a worker
+    process. Algorithm: O(n log n) sort + O(n * window_size) sliding window.
+
+    Returns:
+        list of (source_id, target_id, strength) tuples.
+    """
+    if max_neighbors <= 0 and len(scores) >= _VECTOR_EDGES_MIN_NODES:
+        return _edge_tuples(_window_edge_arrays(scores, delta, max_edges))
+
+    # Sort nodes by score ascending for sliding window; ids and scores are
+    # kept in parallel lists so the inner loops index flat lists, not tuples
     sorted_nodes = sorted(scores.items(), key=lambda x: x[1])
-    n = len(sorted_nodes)
+    ids = [node_id for node_id, _ in sorted_nodes]
+    vals = [score for _, score in sorted_nodes]
+    n = len(ids)
 
     edges: list[tuple[int, int, float]] = []
     j = 0  # trailing pointer
-    degree: dict = {} if max_neighbors > 0 else None
+
+    if max_neighbors <= 0:
+        # No per-node cap: emit each window in one go, nearest first
+        for i in range(n):
+            score_i = vals[i]
+            while j < i and (score_i - vals[j]) > delta:
+                j += 1
+            if j == i:
+                continue
+            id_i = ids[i]
+            if delta > 0:
+                edges.extend(
+                    (ids[k], id_i, 1.0 - (score_i - vals[k]) / delta)
+                    for k in range(i - 1, j - 1, -1)
+                )
+            else:
+                edges.extend((ids[k], id_i, 1.0) for k in range(i - 1, j - 1, -1))
+            if len(edges) >= max_edges:
+                del edges[max_edges:]
+                return edges
+        return edges
+
+    if sweep_capped is not None:
+        return _edge_tuples(_capped_edge_arrays(ids, vals, delta, max_edges, max_neighbors))
+
+    degree: dict = {}
 
     for i in range(n):
-        id_i, score_i = sorted_nodes[i]
+        id_i, score_i = ids[i], vals[i]
 
         # Advance trailing pointer to stay within delta
-        while j < i and (score_i - sorted_nodes[j][1]) > delta:
+        while j < i and (score_i - vals[j]) > delta:
             j += 1
 
-        if max_neighbors > 0 and degree.get(id_i, 0) >= max_neighbors:
+        if degree.get(id_i, 0) >= max_neighbors:
             continue
 
         # Link node i with neighbors in window — reverse to prioritize nearest
         for k in range(i - 1, j - 1, -1):
-            id_k, score_k = sorted_nodes[k]
+            if degree.get(id_i, 0) >= max_neighbors:
+                break  # node i full, remaining are farther
+            id_k = ids[k]
+            if degree.get(id_k, 0) >= max_neighbors:
+                continue  # node k full, try next
 
-            if max_neighbors > 0:
-                if degree.get(id_i, 0) >= max_neighbors:
-                    break  # node i full, remaining are farther
-                if degree.get(id_k, 0) >= max_neighbors:
-                    continue  # node k full, try next
-
-            diff = abs(score_i - score_k)
+            diff = score_i - vals[k]
             strength = 1.0 - diff / delta if delta > 0 else 1.0
             edges.append((id_k, id_i, strength))
 
-            if max_neighbors > 0:
-                degree[id_i] = degree.get(id_i, 0) + 1
-                degree[id_k] = degree.get(id_k, 0) + 1
+            degree[id_i] = degree.get(id_i, 0) + 1
+            degree[id_k] = degree.get(id_k, 0) + 1
 
             if len(edges) >= max_edges:
-                return {
-                    "edges": edges,
-                    "scores": scores,
-                    "count": len(edges),
-                }
+                return edges
 
-    return {
-        "edges": edges,
-        "scores": scores,
-        "count": len(edges),
-    }
+    return edges
+
+
+def _capped_edge_arrays(
+    ids: list, vals: list[float], delta: float, max_edges: int, max_neighbors: int
+) -> EdgeArrays:
+    """Degree-capped window edges via the numba kernel (same output as the loop)."""
+    # Every edge uses up a neighbor slot at both ends, which bounds the count
+    capacity = min(max_edges, len(ids) * max_neighbors // 2)
+    if capacity <= 0:
+        return _empty_edge_arrays()
+    out_k = np.empty(capacity, dtype=np.int64)
+    out_i = np.empty(capacity, dtype=np.int64)
+    out_strength = np.empty(capacity, dtype=np.float64)
+    count = sweep_capped(
+        np.asarray(vals, dtype=np.float64), float(delta), capacity, max_neighbors,
+        out_k, out_i, out_strength,
+    )
+    node_ids = _id_array(ids)
+    return node_ids[out_k[:count]], node_ids[out_i[:count]], out_strength[:count]
+
+
+def _id_array(ids: list) -> np.ndarray:
+    """Message ids as int64, or as an object array if they aren't all ints."""
+    arr = np.asarray(ids)
+    if arr.dtype.kind not in "iu":
+        arr = np.asarray(ids, dtype=object)
+    return arr
+
+
+def _empty_edge_arrays() -> EdgeArrays:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+
+def _edge_tuples(arrays: EdgeArrays) -> list[tuple[int, int, float]]:
+    src, tgt, strength = arrays
+    return list(zip(src.tolist(), tgt.tolist(), strength.tolist()))
+
+
+def _window_edge_arrays(scores: dict[int, float], delta: float, max_edges: int) -> EdgeArrays:
+    """NumPy version of the uncapped sliding window in proximity_edges_from_scores.
+
+    Same edges in the same order: a stable argsort matches sorted(), window
+    starts come from searchsorted, then every window is expanded at once
+    with repeat/arange. Only the first max_edges edges are materialized.
+    """
+    n = len(scores)
+    v = np.fromiter(scores.values(), dtype=np.float64, count=n)
+    order = np.argsort(v, kind="stable")
+    v = v[order]
+    node_ids = _id_array(list(scores))[order]
+    idx = np.arange(n)
+
+    # searchsorted compares against v - delta, which can round differently
+    # from the scalar loop's v[i] - v[j] > delta; nudge each start until
+    # it agrees, so window boundaries match exactly
+    lo = np.minimum(np.searchsorted(v, v - delta, side="left"), idx)
+    while True:
+        shrink = (lo < idx) & (v - v[np.minimum(lo, n - 1)] > delta)
+        grow = (lo > 0) & (v - v[np.maximum(lo - 1, 0)] <= delta)
+        if not (shrink.any() or grow.any()):
+            break
+        lo = lo + shrink - grow
+
+    counts = idx - lo
+    ends = np.cumsum(counts)
+    limit = min(int(ends[-1]), max_edges)
+    if limit <= 0:
+        return _empty_edge_arrays()
+
+    # Windows 0..last-1 hold the first `limit` edges
+    last = int(np.searchsorted(ends, limit)) + 1
+    counts = counts[:last]
+    i_idx = np.repeat(idx[:last], counts)[:limit]
+    offsets = np.arange(limit) - np.repeat(ends[:last] - counts, counts)[:limit]
+    k_idx = i_idx - 1 - offsets  # nearest neighbor first, as in the scalar loop
+
+    # Distance and strength share one buffer: gather, then update in place
+    if delta > 0:
+        strengths = v[i_idx]
+        strengths -= v[k_idx]
+        strengths /= delta
+        np.subtract(1.0, strengths, out=strengths)
+    else:
+        strengths = np.ones(limit)
+
+    return node_ids[k_idx], node_ids[i_idx], strengths
 
 
 def generate_embeddings(
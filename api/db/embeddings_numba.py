@@ -0,0 +1,54 @@
+"""Numba kernel for degree-capped proximity edges.
+
+Optional: when numba is not installed, `sweep_capped` is None and
+proximity_edges_from_scores keeps its pure-Python loop. The kernel walks
+the same sorted sliding window, so it produces the same edges in the
+same order.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional: pip install numba
+    njit = None
+
+
+def _sweep_capped(vals, delta, max_edges, max_neighbors, out_k, out_i, out_strength):
+    """Fill out_* with (k, i, strength) window edges; return the edge count.
+
+    vals must be sorted ascending. k and i are positions in vals; every
+    position takes part in at most max_neighbors edges.
+    """
+    n = vals.shape[0]
+    degree = np.zeros(n, dtype=np.int64)
+    count = 0
+    j = 0
+    for i in range(n):
+        score_i = vals[i]
+        while j < i and (score_i - vals[j]) > delta:
+            j += 1
+        if degree[i] >= max_neighbors:
+            continue
+        for k in range(i - 1, j - 1, -1):
+            if degree[i] >= max_neighbors:
+                break
+            if degree[k] >= max_neighbors:
+                continue
+            out_k[count] = k
+            out_i[count] = i
+            out_strength[count] = 1.0 - (score_i - vals[k]) / delta if delta > 0 else 1.0
+            degree[i] += 1
+            degree[k] += 1
+            count += 1
+            if count >= max_edges:
+                return count
+    return count
+
+
+if njit is not None:
+    sweep_capped = njit(
+        "int64(float64[::1], float64, int64, int64, int64[::1], int64[::1], float64[::1])",
+        cache=True,
+    )(_sweep_capped)
+else:
+    sweep_capped = None
@@ -3,14 +3,16 @@
 Uses session context (summaries) to score individual message importance.
 Two-phase approach: expensive summary generation, then cheap per-message scoring.
 """
-from .context import SessionContext, SessionContextManager
-from .scorer import ImportanceScorer
+from .context import SessionContext, SessionContextManager, get_context_manager
+from .scorer import ImportanceScorer, get_scorer
 from .backfill import backfill_importance_scores, get_importance_stats
 
 __all__ = [
     'SessionContext',
     'SessionContextManager',
     'ImportanceScorer',
+    'get_context_manager',
+    'get_scorer',
     'backfill_importance_scores',
     'get_importance_stats',
 ]
@@ -6,8 +6,8 @@ Two-phase approach:
 """
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from ..queries import get_connection
-from .context import SessionContextManager
-from .scorer import ImportanceScorer
+from .context import get_context_manager
+from .scorer import get_scorer
 
 
 def get_importance_stats() -> dict:
@@ -47,8 +47,8 @@ def _process_single_session(
 
     Returns dict with session_id, context_created, messages_scored, error.
     """
-    manager = SessionContextManager(staleness_days=staleness_days)
-    scorer = ImportanceScorer()
+    manager = get_context_manager(staleness_days)
+    scorer = get_scorer()
 
     try:
         context, was_created = manager.get_or_create_context(session_id)
@@ -91,7 +91,7 @@ def backfill_importance_scores(
     Returns:
         Summary dict with sessions_processed, messages_scored, contexts_created, errors
     """
-    manager = SessionContextManager(staleness_days=staleness_days)
+    manager = get_context_manager(staleness_days)
 
     results = {
         "sessions_processed": 0,
@@ -130,7 +130,7 @@ def backfill_importance_scores(
                         results["contexts_reused"] += 1
     else:
         # Sequential execution (original behavior)
-        scorer = ImportanceScorer()
+        scorer = get_scorer()
         for session_id in session_ids:
             try:
                 context, was_created = manager.get_or_create_context(session_id)
@@ -162,8 +162,8 @@ def score_single_session(session_id: str, batch_size: int = 100) -> dict:
     Returns:
         dict with session_id, context_created, messages_scored, status
     """
-    manager = SessionContextManager(staleness_days=0)  # Don't check staleness
-    scorer = ImportanceScorer()
+    manager = get_context_manager(0)  # Don't check staleness
+    scorer = get_scorer()
 
     context, was_created = manager.get_or_create_context(session_id)
     if context is None:
@@ -198,8 +198,8 @@ def rescore_sessions(session_ids: list[str], batch_size: int = 30) -> dict:
     Returns:
         dict with sessions_processed, messages_rescored, errors
     """
-    manager = SessionContextManager(staleness_days=0)
-    scorer = ImportanceScorer()
+    manager = get_context_manager(0)
+    scorer = get_scorer()
 
     results = {
         "sessions_processed": 0,
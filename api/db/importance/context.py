@@ -5,6 +5,7 @@ SessionContextManager handles creation, retrieval, and staleness detection.
 """
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from typing import Optional
 import json
 import os
@@ -304,3 +305,13 @@ Be concise. Focus on the key points."""
             return context, True
 
         return None, False
+
+
+@lru_cache(maxsize=4)
+def get_context_manager(staleness_days: float = 1.0) -> SessionContextManager:
+    """Get the shared SessionContextManager for a staleness threshold.
+
+    The manager holds no per-call state (connections are opened per query),
+    so one instance per threshold is safe to reuse across threads.
+    """
+    return SessionContextManager(staleness_days=staleness_days)
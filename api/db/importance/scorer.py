@@ -6,6 +6,7 @@ for relative importance within the conversation.
 import json
 import os
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 from ..queries import get_connection
@@ -241,3 +242,13 @@ Respond with JSON only, no markdown code blocks:
         cur.close()
         conn.close()
         return updated
+
+
+@lru_cache(maxsize=1)
+def get_scorer() -> ImportanceScorer:
+    """Get the shared ImportanceScorer.
+
+    The scorer is stateless (connections are opened per query and the LLM
+    client is cached in db.llm), so one instance serves every request.
+    """
+    return ImportanceScorer()
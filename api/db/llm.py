@@ -14,6 +14,7 @@ import hashlib
 import json
 import os
 import sqlite3
+import threading
 from typing import Optional
 
 # Provider detection order
@@ -21,6 +22,8 @@ _PROVIDER: Optional[str] = None
 _DEFAULT_MODEL: Optional[str] = None
 _CLIENT = None
 _initialized = False
+# Serializes first-use client creation; rescoring calls in from several threads
+_init_lock = threading.Lock()
 
 
 class LLMUnavailableError(Exception):
@@ -63,45 +66,53 @@ def _get_client():
     if _initialized:
         return _CLIENT, _PROVIDER, _DEFAULT_MODEL
 
-    _PROVIDER, _DEFAULT_MODEL = _detect_provider()
-    _initialized = True
+    with _init_lock:
+        if not _initialized:
+            _PROVIDER, _DEFAULT_MODEL = _detect_provider()
+            _CLIENT = _create_client(_PROVIDER)
+            # Set last, so the unlocked check above never sees a half-built client
+            _initialized = True
+    return _CLIENT, _PROVIDER, _DEFAULT_MODEL
 
-    if _PROVIDER is None:
-        _CLIENT = None
-        return _CLIENT, _PROVIDER, _DEFAULT_MODEL
 
-    if _PROVIDER == "openai":
+def _create_client(provider: Optional[str]):
+    """Build the SDK client for a provider (None when no provider is set)."""
+    if provider is None:
+        return None
+
+    if provider == "openai":
         from openai import OpenAI
-        _CLIENT = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+        return OpenAI(api_key=os.environ["OPENAI_API_KEY"])
 
-    elif _PROVIDER == "anthropic":
+    elif provider == "anthropic":
         # Use anthropic SDK directly
         import anthropic
-        _CLIENT = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+        return anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
 
-    elif _PROVIDER == "google":
+    elif provider == "google":
         from openai import OpenAI
-        _CLIENT = OpenAI(
+        return OpenAI(
             api_key=os.environ["GOOGLE_API_KEY"],
             base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
         )
 
-    elif _PROVIDER == "litellm":
+    elif provider == "litellm":
         from openai import OpenAI
         base_url = os.environ.get("LITELLM_BASE_URL", "http://localhost:4001")
         api_key = os.environ.get("LITELLM_API_KEY", "sk-litellm-master-key")
-        _CLIENT = OpenAI(base_url=f"{base_url}/v1", api_key=api_key)
+        return OpenAI(base_url=f"{base_url}/v1", api_key=api_key)
 
-    return _CLIENT, _PROVIDER, _DEFAULT_MODEL
+    return None
 
 
 def reset():
     """Reset cached client (useful for testing or env changes)."""
     global _PROVIDER, _DEFAULT_MODEL, _CLIENT, _initialized
-    _PROVIDER = None
-    _DEFAULT_MODEL = None
-    _CLIENT = None
-    _initialized = False
+    with _init_lock:
+        _initialized = False
+        _PROVIDER = None
+        _DEFAULT_MODEL = None
+        _CLIENT = None
 
 
 def is_available() -> bool:
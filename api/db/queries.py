@@ -5,6 +5,7 @@ import sqlite3
 import json
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Iterator
 
 # Database path: env var or default to config dir
 _default_db_path = os.path.join(
@@ -64,6 +65,32 @@ def _run_migrations():
     """)
     conn.commit()
 
+    # Index used by project detection (tool_name filter + file_path extraction)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tool_usages_name_path
+            ON tool_usages (tool_name, message_id, json_extract(tool_input, '$.file_path'))
+    """)
+    conn.commit()
+
+    # Materialized project counts for incremental project detection
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS session_project_counts (
+            session_id TEXT    NOT NULL,
+            project    TEXT    NOT NULL,
+            cnt        INTEGER NOT NULL,
+            PRIMARY KEY (session_id, project),
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS project_detection_state (
+            id                INTEGER PRIMARY KEY,
+            max_tool_usage_id INTEGER NOT NULL DEFAULT 0,
+            updated_at        TEXT
+        )
+    """)
+    conn.commit()
+
     cur.close()
     conn.close()
 
@@ -170,6 +197,37 @@ def get_session_messages(session_id: str) -> list[dict]:
     return df
 
 
+def iter_session_message_batches(session_id: str, batch_size: int = 1000) -> Iterator[list[dict]]:
+    """Yield a session's messages in order, batch_size rows per list.
+
+    Same rows as get_session_messages, for streaming without holding the
+    whole session in memory. The connection is opened with
+    check_same_thread=False so an async caller can advance the generator
+    one step at a time from whichever worker thread runs it; never advance
+    it from two threads at once.
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT
+                m.id,
+                m.role,
+                m.content,
+                m.timestamp,
+                m.sequence_num
+            FROM messages m
+            WHERE m.session_id = ?
+            ORDER BY m.sequence_num
+        """, (session_id,))
+        while rows := cur.fetchmany(batch_size):
+            yield [dict(row) for row in rows]
+    finally:
+        cur.close()
+        conn.close()
+
+
 def get_session_messages_before(session_id: str, before_timestamp: str) -> list[dict]:
     """Get messages for a session up to (and including) a specific timestamp.
 
@@ -466,9 +524,20 @@ def get_recent_user_messages(hours: float = 24, limit: int = 20) -> list[dict]:
     return [dict(row) for row in rows] if rows else []
 
 
-def get_graph_data(hours: float = 24, session_filter: str = None) -> tuple[list, list]:
+def get_graph_data(
+    hours: float = 24,
+    session_filter: str = None,
+    since_id: int | None = None,
+) -> tuple[list, list]:
     """Get nodes and links for graph visualization.
 
+    Args:
+        hours: Time window to look back (ignored when session_filter is set).
+        session_filter: Optional session_id to restrict to.
+        since_id: If set, only return messages with id > since_id (delta
+            polling). The first new message per session is linked to its
+            predecessor even if that predecessor is not in the delta.
+
     Returns:
         tuple: (nodes, links) where
             nodes = [{ id, role, content_preview, session_id, timestamp, importance_score, semantic_filter_matches }, ...]
@@ -483,49 +552,42 @@ def get_graph_data(hours: float = 24, session_filter: str = None) -> tuple[list,
 
     # Build query with optional session filter
     if session_filter:
-        query = """
-            SELECT
-                m.id,
-                m.session_id,
-                m.role,
-                m.content,
-                m.timestamp,
-                m.sequence_num,
-                m.importance_score,
-                m.importance_reason,
-                m.token_count,
-                m.input_tokens,
-                m.cache_read_tokens,
-                m.cache_creation_tokens,
-                s.cwd
-            FROM messages m
-            JOIN sessions s ON m.session_id = s.session_id
-            WHERE m.session_id = ?
-            ORDER BY m.session_id, m.sequence_num
-        """
-        params = (session_filter,)
+        where = "m.session_id = ?"
+        params = [session_filter]
     else:
-        query = """
-            SELECT
-                m.id,
-                m.session_id,
-                m.role,
-                m.content,
-                m.timestamp,
-                m.sequence_num,
-                m.importance_score,
-                m.importance_reason,
-                m.token_count,
-                m.input_tokens,
-                m.cache_read_tokens,
-                m.cache_creation_tokens,
-                s.cwd
-            FROM messages m
-            JOIN sessions s ON m.session_id = s.session_id
-            WHERE m.timestamp >= ?
-            ORDER BY m.session_id, m.sequence_num
-        """
-        params = (since,)
+        where = "m.timestamp >= ?"
+        params = [since]
+
+    # Delta mode: also fetch each message's predecessor in its session
+    prev_col = ""
+    if since_id is not None:
+        where += " AND m.id > ?"
+        params.append(since_id)
+        prev_col = """,
+            (SELECT p.id FROM messages p
+             WHERE p.session_id = m.session_id AND p.sequence_num < m.sequence_num
+             ORDER BY p.sequence_num DESC LIMIT 1) as prev_id"""
+
+    query = f"""
+        SELECT
+            m.id,
+            m.session_id,
+            m.role,
+            m.content,
+            m.timestamp,
+            m.sequence_num,
+            m.importance_score,
+            m.importance_reason,
+            m.token_count,
+            m.input_tokens,
+            m.cache_read_tokens,
+            m.cache_creation_tokens,
+            s.cwd{prev_col}
+        FROM messages m
+        JOIN sessions s ON m.session_id = s.session_id
+        WHERE {where}
+        ORDER BY m.session_id, m.sequence_num
+    """
 
     cur.execute(query, params)
     rows = cur.fetchall()
@@ -550,6 +612,10 @@ def get_graph_data(hours: float = 24, session_filter: str = None) -> tuple[list,
         role = row['role']
         content = row['content'] or ""
 
+        # Delta mode: link the first new message to the one the client already has
+        if since_id is not None and session_id not in prev_msg and row['prev_id'] is not None:
+            prev_msg[session_id] = str(row['prev_id'])
+
         # Create node
         nodes.append({
             'id': msg_id,
@@ -736,20 +802,20 @@ def get_project_session_graph_data(hours: float = 720) -> tuple[list, list]:
     cur = conn.cursor()
     since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
 
+    # Count messages with a correlated subquery (served by idx_messages_session)
+    # rather than joining every message row and grouping on the summary text.
     cur.execute("""
         SELECT
             s.session_id,
             s.cwd,
             s.start_time,
-            COUNT(m.id) as message_count,
+            (SELECT COUNT(*) FROM messages m WHERE m.session_id = s.session_id) as message_count,
             ss.summary,
             ss.topics,
             ss.detected_project
         FROM sessions s
-        LEFT JOIN messages m ON s.session_id = m.session_id
         LEFT JOIN session_summaries ss ON s.session_id = ss.session_id
         WHERE s.start_time >= ?
-        GROUP BY s.session_id, s.cwd, s.start_time, ss.summary, ss.topics, ss.detected_project
         ORDER BY s.start_time DESC
     """, (since,))
 
@@ -765,7 +831,8 @@ def get_project_session_graph_data(hours: float = 720) -> tuple[list, list]:
 
     for row in rows:
         detected = row.get('detected_project')
-        session_topics = _parse_topics(row['topics'])
+        # Parse once; reused when building session nodes below
+        session_topics = row['topics'] = _parse_topics(row['topics'])
 
         if detected:
             group_name = detected
@@ -810,7 +877,7 @@ def get_project_session_graph_data(hours: float = 720) -> tuple[list, list]:
 
         for session in group_data['sessions']:
             session_id = session['session_id']
-            session_topics = _parse_topics(session['topics'])
+            session_topics = session['topics']
 
             nodes.append({
                 'id': session_id,
@@ -0,0 +1,17 @@
+"""Gunicorn settings for running the API under UvicornWorker.
+
+Usage (from api/):  gunicorn main:app -c gunicorn.conf.py
+One worker by default, matching `python main.py`. Each worker is a
+separate process with its own query cache, ingest limiter and CPU process
+pool, so with API_WORKERS > 1: /cache/flush and post-ingest cache clears
+reach only the worker that served them, concurrent /ingest calls are not
+serialized across workers, and every worker starts its own pool.
+"""
+import os
+
+bind = os.environ.get("API_BIND", "0.0.0.0:10800")
+workers = int(os.environ.get("API_WORKERS", 1))
+worker_class = "uvicorn.workers.UvicornWorker"  # uvloop + httptools via uvicorn[standard]
+worker_connections = 1000
+keepalive = 5
+accesslog = None
@@ -2,20 +2,33 @@
 
 Provides REST endpoints for the Rust desktop app to fetch graph data.
 """
-from fastapi import FastAPI, Query
+import asyncio
+import importlib.util
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+
+from anyio import CapacityLimiter, to_thread
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from typing import Optional
-import json
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+from typing import AsyncIterator, Iterator, Optional
+import orjson
+import os
 import uvicorn
 from pathlib import Path as FilePath
 
 # Import from local db module (self-contained)
 from db.queries import (
+    DB_PATH,
     get_graph_data,
     get_sessions,
     get_overview_metrics,
     get_session_messages,
+    iter_session_message_batches,
     get_session_summary,
     get_tool_usage,
     get_project_session_graph_data,
@@ -27,6 +40,8 @@ from db.importance.backfill import (
     score_single_session as score_session,
     rescore_sessions,
 )
+from db.importance.context import get_context_manager
+from db.importance.scorer import get_scorer
 
 from project_detection import (
     get_project_summary,
@@ -50,22 +65,108 @@ from db.embeddings import (
     get_embedding_stats,
     generate_embeddings,
     search_by_query,
-    compute_proximity_edges,
+    proximity_edge_arrays,
 )
 from db.mail import get_mail_network
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional: pip install brotli-asgi
+    BrotliMiddleware = None
+from cache import TTLCache
+from responses import (
+    ARROW_AVAILABLE,
+    NDJSON_MEDIA_TYPE,
+    ArrowResponse,
+    MsgPackResponse,
+    ORJSONResponse,
+    conditional_response,
+    content_etag,
+    json_elements,
+    json_members,
+    ndjson_lines,
+    negotiated_response,
+    sse_event,
+    wants_msgpack,
+)
 # Commented out - health_ingest module not present
 # from db.health_ingest import (
 #     ingest_payload as health_ingest_payload,
 #     get_recent_sleep,
 #     get_health_stats,
 # )
-import subprocess
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+# Blocking work runs on the AnyIO threadpool, with a separate budget per
+# class of work so slow LLM calls can't occupy every thread while cheap
+# DB reads queue behind them.
+LLM_LIMITER = CapacityLimiter(8)
+DB_LIMITER = CapacityLimiter(32)
+INGEST_LIMITER = CapacityLimiter(1)
+
+# Pure-CPU work (the proximity edge sweep) runs in worker processes so
+# concurrent requests aren't serialized on the GIL. Created on first use;
+# small inputs stay in-thread since pickling would cost more than it saves.
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+CPU_POOL_MIN_NODES = 5000
+
+
+def _get_cpu_pool() -> ProcessPoolExecutor:
+    global _cpu_pool
+    if _cpu_pool is None:
+        workers = int(os.environ.get("API_CPU_WORKERS", max(2, (os.cpu_count() or 2) - 1)))
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _cpu_pool
+
+
+# Concurrent requests for the same query text share one search_by_query call
+_inflight_searches: dict[str, asyncio.Task] = {}
+
+
+async def _search_coalesced(query_text: str) -> dict[int, float]:
+    """Run search_by_query, joining an identical search already in flight."""
+    task = _inflight_searches.get(query_text)
+    if task is None:
+        task = asyncio.ensure_future(
+            to_thread.run_sync(search_by_query, query_text, limiter=LLM_LIMITER)
+        )
+        _inflight_searches[query_text] = task
+        task.add_done_callback(lambda _: _inflight_searches.pop(query_text, None))
+    # Shield so one caller disconnecting doesn't cancel the others' result
+    return await asyncio.shield(task)
+
+
+INGEST_SCRIPT = FilePath(__file__).parent.parent / "ingest.py"
+# No new session is started after this many seconds; the rest waits for the next call
+INGEST_TIMEOUT = float(os.environ.get("INGEST_TIMEOUT", 300))
+
+# Polled read-only endpoints reuse results for a few seconds
+# Entries are (body, media_type); the ETag is the body's content hash
+_query_cache = TTLCache(
+    etag=lambda entry: content_etag(entry[0]),
+    maxsize=256,
+    ttl=float(os.environ.get("API_CACHE_TTL", 5)),
+)
+_CACHE_CONTROL = f"private, max-age={int(_query_cache.ttl)}"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Widen the default pool used by sync routes (StreamingResponse iterators)
+    to_thread.current_default_thread_limiter().total_tokens = 128
+    yield
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(cancel_futures=True)
+
 
 app = FastAPI(
     title="Dashboard API",
     description="REST API for Claude Activity Dashboard",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Allow requests from the Rust app
@@ -76,93 +177,224 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (graph, messages, scores) for clients that
+# send Accept-Encoding: gzip. Small responses are passed through as-is.
+# When brotli-asgi is installed, clients accepting br get that instead; it
+# sits inside GZip so the outer layer skips already-encoded responses.
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, gzip_fallback=False)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
 
 # Pydantic models for request bodies
-class SemanticFilterCreate(BaseModel):
+class RequestModel(BaseModel):
+    """Base for request bodies: read-only once parsed, unknown fields dropped."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+
+class SemanticFilterCreate(RequestModel):
     name: str
     query_text: str
     filter_type: str = 'semantic'
 
 
-class RescoreRequest(BaseModel):
+class RescoreRequest(RequestModel):
     session_ids: list[str]
 
 
-class NeighborhoodSummaryRequest(BaseModel):
-    message_ids: list[str]
+class NeighborhoodSummaryRequest(RequestModel):
+    message_ids: list[int]  # graph node ids arrive as numeric strings; pydantic parses them
 
 
-class SimilaritySearchRequest(BaseModel):
+class SimilaritySearchRequest(RequestModel):
     query_text: str
 
 
-class CategorizeVisibleRequest(BaseModel):
+class CategorizeVisibleRequest(RequestModel):
     message_ids: list[int]
 
 
-class FilterComputeRequest(BaseModel):
+class FilterComputeRequest(RequestModel):
     filter_modes: dict[int, str]
     hours: float = 24
 
 
-class ProximityEdgesRequest(BaseModel):
+class ProximityEdgesRequest(RequestModel):
     query_text: str
     delta: float = 0.1
     max_edges: int = 100_000
     max_neighbors: int = 0
 
 
+class GenerateVisibleRequest(RequestModel):
+    message_ids: list[int]
+    batch_size: int = 100
+    max_messages: int = 50000
+
+
+# Build request validators at import time instead of on first use
+for _model in (
+    SemanticFilterCreate,
+    RescoreRequest,
+    NeighborhoodSummaryRequest,
+    SimilaritySearchRequest,
+    CategorizeVisibleRequest,
+    FilterComputeRequest,
+    ProximityEdgesRequest,
+    GenerateVisibleRequest,
+):
+    _model.model_rebuild(force=True)
+
+
+async def _cached_query(request: Request, key: tuple, fn, *args, build=ORJSONResponse):
+    """Run a read-only query through the TTL cache and wrap it with an ETag.
+
+    `build` turns the query result into a response; the rendered body is
+    what gets cached, so hits skip serialization as well as the query.
+    Returns 304 if the client's If-None-Match matches the cached entry.
+    """
+    def render():
+        response = build(fn(*args))
+        return response.body, response.media_type
+
+    (body, media_type), etag = await to_thread.run_sync(
+        _query_cache.get_or_call, key, render, limiter=DB_LIMITER
+    )
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
+
+
 @app.get("/health")
-def health():
+async def health():
     """Health check endpoint."""
     return {"status": "ok"}
 
 
 @app.get("/graph")
-def graph(
+async def graph(
+    request: Request,
     hours: float = Query(default=24, description="Hours to look back"),
     session_id: Optional[str] = Query(default=None, description="Filter to specific session"),
+    since_id: Optional[int] = Query(default=None, description="Only return messages with id > since_id"),
+    format: str = Query(default="json", pattern="^(json|arrow|ndjson)$", description="json, arrow or ndjson"),
 ):
     """Get graph nodes and edges for visualization.
 
     Returns nodes (messages) and edges (sequential links between messages).
+    `max_id` is the highest message id returned; pass it back as `since_id`
+    to fetch only messages added since the last poll.
+    Send `Accept: application/msgpack` to receive MessagePack instead of JSON,
+    or pass `format=arrow` for a single-row Arrow IPC stream (needs pyarrow).
+    `format=ndjson` streams one `{"node": ...}` or `{"edge": ...}` per line,
+    ending with a `{node_count, edge_count, max_id}` line; it is not cached.
     """
-    nodes, edges = get_graph_data(hours, session_id)
-    return {
-        "nodes": nodes,
-        "edges": edges,
-        "node_count": len(nodes),
-        "edge_count": len(edges),
-    }
+    if format == "ndjson":
+        nodes, edges = await to_thread.run_sync(
+            get_graph_data, hours, session_id, since_id, limiter=DB_LIMITER
+        )
+        return StreamingResponse(
+            _graph_ndjson(nodes, edges, since_id), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    arrow = format == "arrow"
+    if arrow and not ARROW_AVAILABLE:
+        return ORJSONResponse({"error": "pyarrow is not installed"}, status_code=501)
+
+    def build(result):
+        nodes, edges = result
+        max_id = max((int(n["id"]) for n in nodes), default=since_id or 0)
+        content = {
+            "nodes": nodes,
+            "edges": edges,
+            "node_count": len(nodes),
+            "edge_count": len(edges),
+            "max_id": max_id,
+        }
+        if arrow:
+            return ArrowResponse(content)
+        return negotiated_response(request, content)
+
+    # The response format is part of the key so each representation gets its own ETag
+    key = ("graph", hours, session_id, since_id, "arrow" if arrow else wants_msgpack(request))
+    return await _cached_query(
+        request, key, get_graph_data, hours, session_id, since_id, build=build
+    )
 
 
 @app.get("/sessions")
-def sessions(
+async def sessions(
+    request: Request,
     hours: float = Query(default=24, description="Hours to look back"),
     limit: int = Query(default=50, description="Max sessions to return"),
 ):
     """Get list of sessions with metadata."""
-    rows = get_sessions(hours, limit)
-    return {"sessions": rows}
+    return await _cached_query(
+        request, ("sessions", hours, limit), get_sessions, hours, limit,
+        build=lambda rows: ORJSONResponse({"sessions": rows}),
+    )
 
 
 @app.get("/metrics")
-def metrics(
+async def metrics(
+    request: Request,
     hours: float = Query(default=24, description="Hours to look back"),
 ):
     """Get overview metrics (counts)."""
-    return get_overview_metrics(hours)
+    return await _cached_query(request, ("metrics", hours), get_overview_metrics, hours)
+
+
+def _graph_ndjson(nodes: list, edges: list, since_id: Optional[int]) -> Iterator[bytes]:
+    """Stream the /graph body as NDJSON: nodes, then edges, then counts."""
+    yield from ndjson_lines({"node": node} for node in nodes)
+    yield from ndjson_lines({"edge": edge} for edge in edges)
+    max_id = max((int(n["id"]) for n in nodes), default=since_id or 0)
+    yield orjson.dumps(
+        {"node_count": len(nodes), "edge_count": len(edges), "max_id": max_id},
+        option=orjson.OPT_APPEND_NEWLINE,
+    )
+
+
+async def _session_messages_ndjson(session_id: str) -> AsyncIterator[bytes]:
+    """Stream a session's messages as NDJSON, one fetchmany per worker-thread hop.
+
+    Each batch is fetched with to_thread.run_sync, so the cursor is only
+    ever touched by one thread at a time, and the event loop serializes.
+    """
+    batches = iter_session_message_batches(session_id)
+    try:
+        while batch := await to_thread.run_sync(next, batches, None, limiter=DB_LIMITER):
+            for chunk in ndjson_lines(batch):
+                yield chunk
+    finally:
+        # run_sync is not cancellable, so no fetch is in flight here
+        batches.close()
 
 
 @app.get("/session/{session_id}/messages")
-def session_messages(session_id: str):
-    """Get all messages for a specific session."""
-    rows = get_session_messages(session_id)
-    return {"messages": rows}
+async def session_messages(
+    request: Request,
+    session_id: str,
+    format: str = Query(default="json", pattern="^(json|ndjson)$", description="json or ndjson"),
+):
+    """Get all messages for a specific session.
+
+    `format=ndjson` streams one message per line straight from the cursor,
+    uncached, so long sessions are never held in memory whole.
+    """
+    if format == "ndjson":
+        return StreamingResponse(
+            _session_messages_ndjson(session_id), media_type=NDJSON_MEDIA_TYPE
+        )
+    return await _cached_query(
+        request, ("messages", session_id), get_session_messages, session_id,
+        build=lambda rows: ORJSONResponse({"messages": rows}),
+    )
 
 
 @app.get("/session/{session_id}/summary/partial")
-def partial_summary(
+async def partial_summary(
     session_id: str,
     before_timestamp: str = Query(..., description="Generate summary up to this ISO timestamp"),
 ):
@@ -171,14 +403,17 @@ def partial_summary(
     Returns summary, completed work, unsuccessful attempts, and message counts.
     This call may take 2-5 seconds as it invokes Gemini.
     """
-    result = generate_partial_summary(session_id, before_timestamp)
+    result = await to_thread.run_sync(
+        generate_partial_summary, session_id, before_timestamp, limiter=LLM_LIMITER
+    )
     if result is None:
         return {"error": "Failed to generate summary - no messages found"}
     return result
 
 
 @app.get("/session/{session_id}/summary")
-def session_summary(
+async def session_summary(
+    request: Request,
     session_id: str,
     generate: bool = Query(default=False, description="Generate summary if it doesn't exist"),
 ):
@@ -188,101 +423,115 @@ def session_summary(
     If generate=true, will create the summary via AI if it doesn't exist (may take 2-5 seconds).
     """
     # Fast path: just check database
-    result = get_session_summary(session_id)
+    result = await to_thread.run_sync(get_session_summary, session_id, limiter=DB_LIMITER)
     if result is not None:
-        return {"exists": True, "generated": False, **result}
+        response = ORJSONResponse({"exists": True, "generated": False, **result})
+        return conditional_response(request, response, _CACHE_CONTROL)
 
     # No summary exists
     if not generate:
-        return {"exists": False, "generated": False}
+        return ORJSONResponse({"exists": False, "generated": False})
 
-    # Generate new summary via AI
-    result = get_or_create_summary(session_id)
+    # Generate new summary via AI. The lookup above already missed, so skip
+    # get_or_create_summary's own existence check.
+    result = await to_thread.run_sync(
+        partial(get_or_create_summary, session_id, force_refresh=True), limiter=LLM_LIMITER
+    )
     if result is None:
-        return {"exists": False, "generated": False, "error": "Failed to generate summary"}
-
-    # Convert datetime to ISO string if present
-    if result.get('generated_at') and hasattr(result['generated_at'], 'isoformat'):
-        result['generated_at'] = result['generated_at'].isoformat()
+        return ORJSONResponse({"exists": False, "generated": False, "error": "Failed to generate summary"})
 
-    return {"exists": True, "generated": True, **result}
+    # generated_at is stored as TEXT; orjson would also handle a datetime
+    return ORJSONResponse({"exists": True, "generated": True, **result})
 
 
 @app.post("/summary/neighborhood")
-def neighborhood_summary(body: NeighborhoodSummaryRequest):
+async def neighborhood_summary(body: NeighborhoodSummaryRequest):
     """Generate an AI summary covering a node and its direct graph neighbors.
 
     Body: { "message_ids": ["123", "456", ...] }
     Returns: { summary, themes, node_count, session_count }
+    Non-numeric ids are rejected with a 422 during request validation.
     """
-    try:
-        int_ids = [int(mid) for mid in body.message_ids]
-    except ValueError:
-        return {"error": "All message_ids must be numeric strings"}
-
-    if not int_ids:
+    if not body.message_ids:
         return {"error": "message_ids must not be empty"}
 
-    result = generate_neighborhood_summary(int_ids)
+    result = await to_thread.run_sync(
+        generate_neighborhood_summary, body.message_ids, limiter=LLM_LIMITER
+    )
     if result is None:
         return {"error": "Failed to generate neighborhood summary"}
     return result
 
 
 @app.get("/tools")
-def tools(
+async def tools(
+    request: Request,
     hours: float = Query(default=24, description="Hours to look back"),
 ):
     """Get tool usage statistics."""
-    rows = get_tool_usage(hours)
-    return {"tools": rows}
+    return await _cached_query(
+        request, ("tools", hours), get_tool_usage, hours,
+        build=lambda rows: ORJSONResponse({"tools": rows}),
+    )
 
 
 @app.get("/projects")
-def projects():
+async def projects(request: Request):
     """Get list of detected projects with session counts."""
-    return {"projects": get_project_summary()}
+    return await _cached_query(
+        request, ("projects",), get_project_summary,
+        build=lambda rows: ORJSONResponse({"projects": rows}),
+    )
 
 
 @app.get("/projects/graph")
-def project_graph(
+async def project_graph(
+    request: Request,
     hours: float = Query(default=720, description="Hours to look back (default 30 days)"),
 ):
     """Get hierarchical graph with projects as parent nodes.
 
     Returns project nodes connected to their session nodes.
     Projects come from detected_project or fallback to topics[0].
+    Send `Accept: application/msgpack` to receive MessagePack instead of JSON.
     """
-    nodes, edges = get_project_session_graph_data(hours)
-    return {
+    nodes, edges = await to_thread.run_sync(
+        get_project_session_graph_data, hours, limiter=DB_LIMITER
+    )
+    return negotiated_response(request, {
         "nodes": nodes,
         "edges": edges,
         "node_count": len(nodes),
         "edge_count": len(edges),
-    }
+    })
 
 
 @app.post("/projects/detect")
-def detect_projects(
+async def detect_projects(
     dry_run: bool = Query(default=True, description="If true, don't update database"),
 ):
     """Run project detection on all sessions.
 
     Extracts project names from file paths in tool_usages.
     """
-    return backfill_detected_projects(dry_run=dry_run)
+    result = await to_thread.run_sync(
+        partial(backfill_detected_projects, dry_run=dry_run), limiter=DB_LIMITER
+    )
+    if not dry_run:
+        _query_cache.clear()
+    return result
 
 
 # ==== Importance Scoring Endpoints ====
 
 @app.get("/importance/stats")
-def importance_stats():
+async def importance_stats():
     """Get statistics about importance scoring coverage."""
-    return get_importance_stats()
+    return ORJSONResponse(await to_thread.run_sync(get_importance_stats, limiter=DB_LIMITER))
 
 
 @app.post("/importance/backfill")
-def importance_backfill(
+async def importance_backfill(
     max_sessions: int = Query(default=50, description="Max sessions to process"),
     staleness_days: float = Query(default=1.0, description="Days of inactivity before scoring"),
     batch_size: int = Query(default=100, description="Messages per LLM call"),
@@ -294,11 +543,15 @@ def importance_backfill(
     Calls Gemini to score messages on importance (0.0-1.0).
     This may take 2-5 seconds per session.
     """
-    return backfill_importance_scores(max_sessions, staleness_days, batch_size, parallel, since_days)
+    return await to_thread.run_sync(
+        backfill_importance_scores,
+        max_sessions, staleness_days, batch_size, parallel, since_days,
+        limiter=LLM_LIMITER,
+    )
 
 
 @app.post("/importance/session/{session_id}")
-def importance_score_session(
+async def importance_score_session(
     session_id: str,
     batch_size: int = Query(default=25, description="Messages per LLM call"),
 ):
@@ -306,11 +559,11 @@ def importance_score_session(
 
     Calls Gemini to score unscored messages in the session.
     """
-    return score_session(session_id, batch_size)
+    return await to_thread.run_sync(score_session, session_id, batch_size, limiter=LLM_LIMITER)
 
 
 @app.post("/importance/rescore")
-def importance_rescore(
+async def importance_rescore(
     body: RescoreRequest,
     batch_size: int = Query(default=30, description="Messages per LLM call"),
 ):
@@ -324,47 +577,71 @@ def importance_rescore(
 
     Returns: { sessions_processed, messages_rescored, errors }
     """
-    return rescore_sessions(body.session_ids, batch_size)
+    return await to_thread.run_sync(
+        rescore_sessions, body.session_ids, batch_size, limiter=LLM_LIMITER
+    )
+
 
+# Sessions rescored in parallel by one /importance/rescore/stream request
+RESCORE_CONCURRENCY = 4
 
-def rescore_stream_generator(session_ids: list[str], batch_size: int):
-    """Generator that yields SSE events for rescore progress."""
-    from db.importance.context import SessionContextManager
-    from db.importance.scorer import ImportanceScorer
 
-    manager = SessionContextManager(staleness_days=0)
-    scorer = ImportanceScorer()
+async def rescore_stream_generator(session_ids: list[str], batch_size: int):
+    """Async generator that yields SSE events for rescore progress.
+
+    Up to RESCORE_CONCURRENCY sessions are scored at once; a progress event
+    is sent as each one finishes, so `current` counts completed sessions
+    (1..total). The scorer and context manager are shared across the worker
+    threads: they keep no per-call state and open a connection per query.
+    """
+    manager = get_context_manager(0)
+    scorer = get_scorer()
+    sem = asyncio.Semaphore(RESCORE_CONCURRENCY)
+
+    def score_one(session_id: str) -> int:
+        context, _ = manager.get_or_create_context(session_id)
+        if context is None:
+            raise RuntimeError("failed to create context")
+        scores = scorer.score_session(
+            session_id, context, batch_size=batch_size, force=True
+        )
+        return len(scores)
+
+    async def run(session_id: str):
+        async with sem:
+            try:
+                count = await to_thread.run_sync(score_one, session_id, limiter=LLM_LIMITER)
+                return session_id, count, None
+            except Exception as e:
+                return session_id, 0, e
 
     total = len(session_ids)
     messages_rescored = 0
     sessions_processed = 0
     errors = []
 
-    for i, session_id in enumerate(session_ids):
-        # Yield progress event
-        progress = {
-            "type": "progress",
-            "current": i,
-            "total": total,
-            "session_id": session_id[:8],
-            "messages_so_far": messages_rescored,
-        }
-        yield f"data: {json.dumps(progress)}\n\n"
-
-        try:
-            context, _ = manager.get_or_create_context(session_id)
-            if context is None:
-                errors.append(f"{session_id[:8]}: failed to create context")
-                continue
-
-            scores = scorer.score_session(
-                session_id, context, batch_size=batch_size, force=True
-            )
-            sessions_processed += 1
-            messages_rescored += len(scores)
+    # Progress events differ only in three fields; format them from a
+    # per-request template instead of encoding a dict each time
+    progress_tmpl = (
+        b'data: {"type":"progress","current":%d,"total":' + b"%d" % total
+        + b',"session_id":%s,"messages_so_far":%d}\n\n'
+    )
 
-        except Exception as e:
-            errors.append(f"{session_id[:8]}: {str(e)}")
+    tasks = [asyncio.create_task(run(sid)) for sid in session_ids]
+    try:
+        for done, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+            session_id, count, error = await next_result
+            if error is None:
+                sessions_processed += 1
+                messages_rescored += count
+            else:
+                errors.append(f"{session_id[:8]}: {str(error)}")
+
+            yield progress_tmpl % (done, orjson.dumps(session_id[:8]), messages_rescored)
+    finally:
+        # Client went away mid-stream: don't start the remaining sessions
+        for task in tasks:
+            task.cancel()
 
     # Yield final result
     result = {
@@ -373,7 +650,7 @@ def rescore_stream_generator(session_ids: list[str], batch_size: int):
         "messages_rescored": messages_rescored,
         "errors": errors,
     }
-    yield f"data: {json.dumps(result)}\n\n"
+    yield sse_event(result)
 
 
 @app.post("/importance/rescore/stream")
@@ -396,28 +673,32 @@ def importance_rescore_stream(
 # ==== Semantic Filter Endpoints ====
 
 @app.get("/semantic-filters")
-def list_semantic_filters():
+async def list_semantic_filters():
     """List all semantic filters with stats.
 
     Returns filters with total_scored and matches counts.
     """
-    filters = get_all_filters()
-    return {"filters": filters}
+    filters = await to_thread.run_sync(get_all_filters, limiter=DB_LIMITER)
+    return ORJSONResponse({"filters": filters})
 
 
 @app.post("/semantic-filters")
-def create_semantic_filter(body: SemanticFilterCreate):
+async def create_semantic_filter(body: SemanticFilterCreate):
     """Create a new semantic filter.
 
     Body: { name, query_text, filter_type? }
     Returns the created filter. Rule filters are auto-scored immediately.
     """
     try:
-        filter_data = create_filter(body.name, body.query_text, body.filter_type)
+        filter_data = await to_thread.run_sync(
+            create_filter, body.name, body.query_text, body.filter_type, limiter=DB_LIMITER
+        )
 
         # Auto-score rule filters immediately
         if body.filter_type == 'rule':
-            result = score_rule_filter(filter_data['id'], body.query_text)
+            result = await to_thread.run_sync(
+                score_rule_filter, filter_data['id'], body.query_text, limiter=DB_LIMITER
+            )
             # Update the returned filter with fresh counts
             filter_data['total_scored'] = result['scored']
             filter_data['matches'] = result['matches']
@@ -429,12 +710,12 @@ def create_semantic_filter(body: SemanticFilterCreate):
 
 
 @app.delete("/semantic-filters/{filter_id}")
-def delete_semantic_filter(filter_id: int):
+async def delete_semantic_filter(filter_id: int):
     """Delete a semantic filter and its results.
 
     Returns success status.
     """
-    deleted = delete_filter(filter_id)
+    deleted = await to_thread.run_sync(delete_filter, filter_id, limiter=DB_LIMITER)
     if deleted:
         return {"success": True, "deleted": filter_id}
     else:
@@ -442,19 +723,19 @@ def delete_semantic_filter(filter_id: int):
 
 
 @app.get("/semantic-filters/{filter_id}/status")
-def semantic_filter_status(filter_id: int):
+async def semantic_filter_status(filter_id: int):
     """Get scoring progress for a specific filter.
 
     Returns: { filter_id, name, total, scored, pending, matches }
     """
-    status = get_filter_status(filter_id)
+    status = await to_thread.run_sync(get_filter_status, filter_id, limiter=DB_LIMITER)
     if status is None:
         return {"error": "Filter not found"}
-    return status
+    return ORJSONResponse(status)
 
 
 @app.post("/semantic-filters/{filter_id}/categorize")
-def categorize_filter_messages(
+async def categorize_filter_messages(
     filter_id: int,
     batch_size: int = Query(default=50, description="Messages per LLM call (50-100 recommended)"),
     max_messages: int = Query(default=5000, description="Maximum messages to process"),
@@ -468,15 +749,20 @@ def categorize_filter_messages(
     Returns: { filter_id, scored, matches, ... }
     """
     # Check if this is a rule filter
-    status = get_filter_status(filter_id)
+    status = await to_thread.run_sync(get_filter_status, filter_id, limiter=DB_LIMITER)
     if status and status.get('filter_type') == 'rule':
-        return score_rule_filter(filter_id, status['query_text'])
+        return await to_thread.run_sync(
+            score_rule_filter, filter_id, status['query_text'], limiter=DB_LIMITER
+        )
 
-    return categorize_messages(filter_id, batch_size, max_messages, max_concurrent)
+    return await to_thread.run_sync(
+        categorize_messages, filter_id, batch_size, max_messages, max_concurrent,
+        limiter=LLM_LIMITER,
+    )
 
 
 @app.post("/semantic-filters/{filter_id}/categorize-visible")
-def categorize_filter_messages_visible(
+async def categorize_filter_messages_visible(
     filter_id: int,
     body: CategorizeVisibleRequest,
     batch_size: int = Query(default=50, description="Messages per LLM call (50-100 recommended)"),
@@ -491,20 +777,23 @@ def categorize_filter_messages_visible(
     Body: { message_ids: [1, 2, 3, ...] }
     Returns: { filter_id, scored, matches, batches_processed, errors }
     """
-    return categorize_messages_visible(filter_id, body.message_ids, batch_size, max_concurrent)
+    return await to_thread.run_sync(
+        categorize_messages_visible, filter_id, body.message_ids, batch_size, max_concurrent,
+        limiter=LLM_LIMITER,
+    )
 
 
 @app.get("/semantic-filters/stats")
-def semantic_filter_stats():
+async def semantic_filter_stats():
     """Get statistics about semantic filter scoring coverage.
 
     Returns: { total_messages, filters: [{ id, name, scored_count, match_count }] }
     """
-    return get_filter_stats()
+    return ORJSONResponse(await to_thread.run_sync(get_filter_stats, limiter=DB_LIMITER))
 
 
 @app.post("/filter/compute-visible")
-def filter_compute_visible(body: FilterComputeRequest):
+async def filter_compute_visible(body: FilterComputeRequest):
     """Compute which message IDs are visible given semantic filter modes.
 
     Body: { filter_modes: {filter_id: mode_string}, hours: float }
@@ -513,22 +802,24 @@ def filter_compute_visible(body: FilterComputeRequest):
     Returns: { visible_message_ids: list[int] | null, total_nodes: int, visible_count: int }
     When all filters are off, visible_message_ids is null (no filtering).
     """
-    return compute_visible_set(body.filter_modes, body.hours)
+    return await to_thread.run_sync(
+        compute_visible_set, body.filter_modes, body.hours, limiter=DB_LIMITER
+    )
 
 
 # ==== Embedding / Similarity Search Endpoints ====
 
 @app.get("/embeddings/stats")
-def embedding_stats():
+async def embedding_stats():
     """Get embedding coverage statistics.
 
     Returns: { total, embedded, unembedded, model }
     """
-    return get_embedding_stats()
+    return ORJSONResponse(await to_thread.run_sync(get_embedding_stats, limiter=DB_LIMITER))
 
 
 @app.post("/embeddings/generate")
-def embedding_generate(
+async def embedding_generate(
     batch_size: int = Query(default=100, description="Texts per API call"),
     max_messages: int = Query(default=1000, description="Max messages to embed"),
 ):
@@ -537,39 +828,48 @@ def embedding_generate(
     Calls OpenAI text-embedding-3-small (or Google equivalent).
     Returns: { generated, model, dimensions, errors }
     """
-    return generate_embeddings(batch_size, max_messages)
-
-
-class GenerateVisibleRequest(BaseModel):
-    message_ids: list[int]
-    batch_size: int = 100
-    max_messages: int = 50000
+    return await to_thread.run_sync(
+        generate_embeddings, batch_size, max_messages, limiter=LLM_LIMITER
+    )
 
 
 @app.post("/embeddings/generate-visible")
-def embedding_generate_visible(body: GenerateVisibleRequest):
+async def embedding_generate_visible(body: GenerateVisibleRequest):
     """Generate embeddings only for specific message IDs.
 
     Body: { message_ids: [1, 2, 3], batch_size: 100, max_messages: 50000 }
     Returns: { generated, model, dimensions, errors }
     """
-    return generate_embeddings(body.batch_size, body.max_messages, message_ids=body.message_ids)
+    return await to_thread.run_sync(
+        partial(generate_embeddings, body.batch_size, body.max_messages, message_ids=body.message_ids),
+        limiter=LLM_LIMITER,
+    )
 
 
 @app.post("/embeddings/search")
-def embedding_search(body: SimilaritySearchRequest):
+async def embedding_search(request: Request, body: SimilaritySearchRequest):
     """Search messages by semantic similarity.
 
     Body: { query_text: "frustrated" }
     Returns: { scores: { message_id: float } } for ALL embedded messages.
+    The JSON body is streamed in chunks rather than built in memory first.
+    Send `Accept: application/msgpack` to receive MessagePack instead.
     """
-    scores = search_by_query(body.query_text)
-    # Convert int keys to strings for JSON serialization
-    return {"scores": {str(k): v for k, v in scores.items()}}
+    scores = await _search_coalesced(body.query_text)
+    if wants_msgpack(request):
+        return MsgPackResponse({"scores": {str(k): v for k, v in scores.items()}})
+    return StreamingResponse(_search_stream(scores), media_type="application/json")
+
+
+def _search_stream(scores: dict[int, float]) -> Iterator[bytes]:
+    """Stream the /embeddings/search body; int keys become JSON strings."""
+    yield b'{"scores":{'
+    yield from json_members(scores.items())
+    yield b"}}"
 
 
 @app.post("/embeddings/proximity-edges")
-def embedding_proximity_edges(body: ProximityEdgesRequest):
+async def embedding_proximity_edges(request: Request, body: ProximityEdgesRequest):
     """Compute score-proximity edges between embedded messages.
 
     Given a query phrase, scores all nodes by similarity to that phrase,
@@ -577,72 +877,150 @@ def embedding_proximity_edges(body: ProximityEdgesRequest):
 
     Body: { query_text: "...", delta: 0.1, max_edges: 100000 }
     Returns: { edges: [{source, target, strength}], scores: {msg_id: float}, count, query }
+    The JSON body is streamed in chunks rather than built in memory first.
+    Send `Accept: application/msgpack` to receive MessagePack instead.
     """
-    result = compute_proximity_edges(body.query_text, body.delta, body.max_edges, body.max_neighbors)
-    edges = [
-        {"source": str(src), "target": str(tgt), "strength": round(strength, 4)}
-        for src, tgt, strength in result["edges"]
-    ]
-    scores = {str(k): v for k, v in result["scores"].items()}
-    return {
-        "edges": edges,
-        "scores": scores,
-        "count": len(edges),
-        "query": body.query_text,
-    }
+    scores = await _search_coalesced(body.query_text)
+    args = (scores, body.delta, body.max_edges, body.max_neighbors)
+    if len(scores) >= CPU_POOL_MIN_NODES:
+        loop = asyncio.get_running_loop()
+        edges = await loop.run_in_executor(_get_cpu_pool(), proximity_edge_arrays, *args)
+    else:
+        edges = await to_thread.run_sync(proximity_edge_arrays, *args)
+
+    if wants_msgpack(request):
+        return MsgPackResponse({
+            "edges": list(_edge_dicts(edges)),
+            "scores": {str(k): v for k, v in scores.items()},
+            "count": len(edges[0]),
+            "query": body.query_text,
+        })
+
+    result = {"edges": edges, "scores": scores}
+    return StreamingResponse(
+        _proximity_stream(result, body.query_text),
+        media_type="application/json",
+    )
+
+
+def _proximity_stream(result: dict, query_text: str) -> Iterator[bytes]:
+    """Stream the /embeddings/proximity-edges body one batch of edges at a time."""
+    edges = result["edges"]
+    yield b'{"edges":['
+    yield from json_elements(_edge_dicts(edges))
+    yield b'],"scores":{'
+    yield from json_members(result["scores"].items())
+    yield b'},"count":%d,"query":%s}' % (len(edges[0]), orjson.dumps(query_text))
+
+
+def _edge_dicts(edges: tuple) -> Iterator[dict]:
+    """Wire-format edge dicts from (source_ids, target_ids, strengths) arrays."""
+    src, tgt, strength = edges
+    for s, t, st in zip(src.tolist(), tgt.tolist(), strength.tolist()):
+        yield {"source": str(s), "target": str(t), "strength": round(st, 4)}
+
+
+# ==== Cache Endpoint ====
+
+@app.post("/cache/flush")
+async def cache_flush():
+    """Drop cached query results.
+
+    /ingest does this itself; call it after running ingest.py from the
+    command line so polls see new data before the TTL runs out.
+    """
+    _query_cache.clear()
+    return {"flushed": True}
+
+
+# ==== Bulk Stats Endpoint ====
+
+@app.get("/stats/bulk")
+async def stats_bulk(
+    hours: float = Query(default=24, description="Hours to look back for metrics"),
+):
+    """Fetch importance, semantic filter, embedding and overview stats at once.
+
+    Runs the four queries concurrently so the sidebar refresh needs one
+    round-trip instead of four.
+    Returns: { importance, semantic, embeddings, metrics }
+    """
+    results = await asyncio.gather(
+        to_thread.run_sync(get_importance_stats, limiter=DB_LIMITER),
+        to_thread.run_sync(get_filter_stats, limiter=DB_LIMITER),
+        to_thread.run_sync(get_embedding_stats, limiter=DB_LIMITER),
+        to_thread.run_sync(get_overview_metrics, hours, limiter=DB_LIMITER),
+    )
+    return ORJSONResponse(dict(zip(("importance", "semantic", "embeddings", "metrics"), results)))
 
 
 # ==== Ingest Endpoint ====
 
 @app.post("/ingest")
-def trigger_ingest(
+async def trigger_ingest(
     since: str = Query(default="24h", description="Time window to ingest, e.g. '24h', '7d'"),
 ):
     """Trigger re-ingestion of Claude Code sessions from ~/.claude/.
 
-    Runs ingest.py as a subprocess with --since flag.
-    Returns: { sessions, messages, tools, error? }
+    Calls ingest.py's run_ingest in-process (no new interpreter per call).
+    Only one ingest runs at a time; concurrent requests wait for the
+    current one to finish. After INGEST_TIMEOUT seconds the ingest stops
+    between sessions, keeps what it imported and reports an error.
+    Returns: { sessions, messages, tools, errors, output, error? }
     """
-    ingest_script = FilePath(__file__).parent.parent / "ingest.py"
-    if not ingest_script.exists():
-        return {"error": f"ingest.py not found at {ingest_script}"}
+    result = await to_thread.run_sync(_run_ingest, since, limiter=INGEST_LIMITER)
+    _query_cache.clear()
+    return result
 
-    try:
-        result = subprocess.run(
-            ["python3", str(ingest_script), "--since", since],
-            capture_output=True,
-            text=True,
-            timeout=300,
-        )
 
-        # Parse the "Done: N sessions, N messages, N tool usages" line from output
-        output = result.stdout
-        stats = {"sessions": 0, "messages": 0, "tools": 0, "output": output}
+@lru_cache(maxsize=1)
+def _ingest_module():
+    """Load ../ingest.py once; it lives outside the api directory."""
+    spec = importlib.util.spec_from_file_location("ingest", INGEST_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
-        for line in output.splitlines():
-            if line.startswith("Done:"):
-                import re as _re
-                nums = _re.findall(r"(\d+)", line)
-                if len(nums) >= 3:
-                    stats["sessions"] = int(nums[0])
-                    stats["messages"] = int(nums[1])
-                    stats["tools"] = int(nums[2])
 
-        if result.returncode != 0:
-            stats["error"] = result.stderr or f"Exit code {result.returncode}"
+def _run_ingest(since: str) -> dict:
+    """Run ingest.run_ingest in-process, collecting its progress output (blocking).
 
-        return stats
+    The output stream is passed in rather than redirecting sys.stdout, which
+    would also capture every other thread's prints for the duration.
+    """
+    if not INGEST_SCRIPT.exists():
+        return {"error": f"ingest.py not found at {INGEST_SCRIPT}"}
 
-    except subprocess.TimeoutExpired:
-        return {"error": "Ingest timed out after 300s"}
+    output = io.StringIO()
+    try:
+        ingest = _ingest_module()
+        claude_dir = ingest.DEFAULT_CLAUDE_DIR
+        if not claude_dir.exists():
+            return {"error": f"Claude directory not found: {claude_dir}"}
+
+        counts = ingest.run_ingest(
+            claude_dir, FilePath(DB_PATH), ingest.parse_since(since),
+            out=output, timeout=INGEST_TIMEOUT,
+        )
     except Exception as e:
-        return {"error": str(e)}
+        return {"error": str(e), "output": output.getvalue()}
+
+    result = {
+        "sessions": counts["sessions"],
+        "messages": counts["messages"],
+        "tools": counts["tools"],
+        "errors": counts["errors"],
+        "output": output.getvalue(),
+    }
+    if counts["timed_out"]:
+        result["error"] = f"Ingest timed out after {INGEST_TIMEOUT:g}s; run it again to continue"
+    return result
 
 
 # ==== Mail Network Endpoints ====
 
 @app.get("/mail/network")
-def mail_network():
+async def mail_network():
     """Get mail network graph for agent communication visualization.
 
     Returns a force-directed graph representation:
@@ -652,7 +1030,7 @@ def mail_network():
 
     Used by the mini network graph widget in the sidebar.
     """
-    return get_mail_network()
+    return ORJSONResponse(await to_thread.run_sync(get_mail_network, limiter=DB_LIMITER))
 
 
 # ==== Health Auto Export Endpoints ====
@@ -710,5 +1088,17 @@ def mail_network():
 
 
 if __name__ == "__main__":
-    # Bind to all interfaces for network access
-    uvicorn.run(app, host="0.0.0.0", port=10800)
+    # Bind to all interfaces for network access. One worker by default:
+    # the query cache (and /cache/flush), INGEST_LIMITER's one-ingest-at-a-time
+    # guarantee and the CPU process pool are all per process, so extra
+    # workers get their own copies. Raise API_WORKERS only with that in mind.
+    # uvicorn[standard] provides uvloop + httptools, picked up by "auto".
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=10800,
+        workers=int(os.environ.get("API_WORKERS", 1)),
+        loop="auto",
+        http="auto",
+        access_log=False,
+    )
@@ -4,37 +4,63 @@ Extracts project names from file paths touched during Claude Code sessions.
 """
 import json as json_module
 import os
-import re
+import sqlite3
+import threading
 from collections import Counter
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from db.queries import get_connection
 
+# One connection per thread, opened and tuned on first use
+_tls = threading.local()
+
+# How long a read waits on the write lock before serving stale counts
+_REFRESH_BUSY_TIMEOUT_MS = 250
+_BUSY_TIMEOUT_MS = 5000
+
+
+def _conn():
+    """Return this thread's cached connection, opening it if needed."""
+    conn = getattr(_tls, "conn", None)
+    if conn is None:
+        conn = get_connection()
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA cache_size = -65536")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+        _tls.conn = conn
+    return conn
+
+
 # Get home directory dynamically
 HOME_DIR = os.environ.get("USER_HOME", str(Path.home()))
 
-# Build project root patterns dynamically based on home directory
+# Build project root prefixes dynamically based on home directory
 # These are common locations where code projects live
 def _build_project_roots():
-    """Build project root patterns based on current user's home directory."""
+    """Build project root prefixes based on current user's home directory.
+
+    Returns (prefix, len(prefix)) pairs, longest first, so nested roots
+    like Documents/GitHub win over a shorter parent root.
+    """
     home = HOME_DIR.rstrip('/')
 
     # Common project directories - customize via PROJECT_DIRS env var
     project_dirs = os.environ.get("PROJECT_DIRS", "w,Documents/GitHub,Documents/github,Projects,code").split(",")
 
-    patterns = []
-    for dir_name in project_dirs:
-        pattern = rf'{re.escape(home)}/{re.escape(dir_name.strip())}/([^/]+)/'
-        patterns.append(pattern)
-
-    return patterns
+    prefixes = {f"{home}/{dir_name.strip()}/" for dir_name in project_dirs}
+    return [(prefix, len(prefix)) for prefix in sorted(prefixes, key=len, reverse=True)]
 
 PROJECT_ROOTS = _build_project_roots()
+# Every root lives under home, so other paths can be rejected up front
+_HOME_PREFIX = HOME_DIR.rstrip('/') + '/'
 
 # Directories that aren't real projects
-EXCLUDED_NAMES = {
+EXCLUDED_NAMES = frozenset({
     'PATHS.md',
     'docs',
     '.git',
@@ -42,9 +68,15 @@ EXCLUDED_NAMES = {
     'node_modules',
     '__pycache__',
     '.obsidian',
-}
+})
+
+# Bind parameters for the project detection SQL, flattened once
+_ROOT_PARAMS = tuple(v for prefix, plen in PROJECT_ROOTS for v in (prefix, plen))
+_EXCLUDED_PARAMS = tuple(EXCLUDED_NAMES)
 
 
+# Pure over module-level roots, and the same files are touched over and over
+@lru_cache(maxsize=131072)
 def extract_project_from_path(path: str) -> Optional[str]:
     """Extract project name from a file path.
 
@@ -52,18 +84,23 @@ def extract_project_from_path(path: str) -> Optional[str]:
         ~/projects/myapp/src/main.py -> 'myapp'
         ~/Documents/GitHub/AnkiThings/src/main.ts -> 'AnkiThings'
     """
-    if not path:
+    # One comparison rejects /usr, /Applications, temp dirs and the like
+    if not path or not path.startswith(_HOME_PREFIX):
         return None
 
+    # Only reachable when home itself lives under a temp dir
     if path.startswith('/var/folders/') or path.startswith('/tmp/'):
         return None
 
-    for pattern in PROJECT_ROOTS:
-        match = re.search(pattern, path)
-        if match:
-            project = match.group(1)
-            if project not in EXCLUDED_NAMES:
-                return project
+    # The project is the first path component under a root; it must be
+    # followed by '/' (a bare directory path doesn't count)
+    for prefix, prefix_len in PROJECT_ROOTS:
+        if path.startswith(prefix):
+            slash = path.find('/', prefix_len)
+            if slash > prefix_len:
+                project = path[prefix_len:slash]
+                if project not in EXCLUDED_NAMES:
+                    return project
 
     return None
 
@@ -71,129 +108,219 @@ def extract_project_from_path(path: str) -> Optional[str]:
 def detect_project_for_session(session_id: str) -> Optional[str]:
     """Detect the primary project for a session based on file paths.
 
-    Queries tool_usages for file paths and returns the most common project.
+    Extracts and counts projects in SQLite (same query as
+    detect_all_projects) and returns the most common one.
     """
-    conn = get_connection()
+    conn = _conn()
     cur = conn.cursor()
 
-    try:
-        cur.execute("""
-            SELECT json_extract(tu.tool_input, '$.file_path') as path
-            FROM messages m
-            JOIN tool_usages tu ON m.id = tu.message_id
-            WHERE m.session_id = ?
-              AND tu.tool_name IN ('Read', 'Edit', 'Write', 'Glob', 'Grep')
-              AND json_extract(tu.tool_input, '$.file_path') IS NOT NULL
-        """, (session_id,))
-
-        rows = cur.fetchall()
-
-        if not rows:
-            return None
+    sql, params = _project_counts_sql(session_id)
 
-        project_counts = Counter()
-        for row in rows:
-            project = extract_project_from_path(row['path'])
-            if project:
-                project_counts[project] += 1
-
-        if not project_counts:
-            return None
+    try:
+        cur.execute(f"""
+            {sql}
+            SELECT project, cnt
+            FROM project_counts
+            ORDER BY cnt DESC
+            LIMIT 1
+        """, params)
 
-        return project_counts.most_common(1)[0][0]
+        row = cur.fetchone()
+        return row['project'] if row else None
 
     finally:
         cur.close()
-        conn.close()
 
 
-def _build_sqlite_case_expression():
-    """Build a SQL CASE expression for project detection using SQLite functions.
+def _project_counts_sql(
+    session_id: Optional[str] = None,
+    id_range: Optional[tuple[int, int]] = None,
+) -> tuple[str, list]:
+    """Build the WITH clause that counts file-path projects per session.
 
-    SQLite doesn't have split_part, so we use substr + instr to extract
-    the first path component after the project directory.
-    """
-    home = HOME_DIR.rstrip('/')
-    project_dirs = os.environ.get("PROJECT_DIRS", "w,Documents/GitHub,Documents/github,Projects,code").split(",")
+    Project roots are bound as a small VALUES table and joined by prefix,
+    so each path is matched with one substr comparison per root instead
+    of a CASE cascade of LIKE/replace/instr calls. When roots nest, the
+    longest matching prefix wins, as in extract_project_from_path.
 
-    cases = []
-    for dir_name in project_dirs:
-        dir_path = f"{home}/{dir_name.strip()}"
-        like_pattern = f"{dir_path}/%"
-        # Extract the part after dir_path/, up to the next /
-        # substr(replace(file_path, 'dir_path/', ''), 1, instr(replace(file_path, 'dir_path/', ''), '/') - 1)
-        replace_expr = f"replace(file_path, '{dir_path}/', '')"
-        extract_expr = f"substr({replace_expr}, 1, instr({replace_expr}, '/') - 1)"
-        cases.append(f"""
-            WHEN file_path LIKE '{like_pattern}' THEN
-                CASE WHEN instr({replace_expr}, '/') > 0
-                     THEN {extract_expr}
-                     ELSE {replace_expr}
-                END""")
+    Args:
+        session_id: Restrict to one session; None counts every session.
+        id_range: (after, upto) to count only tool_usages with
+            after < id <= upto; None counts all of them.
 
-    return "CASE" + "".join(cases) + "\n                        ELSE NULL\n                    END"
+    Returns:
+        (sql, params) defining a `project_counts(session_id, project, cnt)` CTE.
+    """
+    params = list(_ROOT_PARAMS)
+    if session_id is not None:
+        params.append(session_id)
+    if id_range is not None:
+        params.extend(id_range)
+    params.extend(_EXCLUDED_PARAMS)
+    return _project_counts_template(session_id is not None, id_range is not None), params
+
+
+@lru_cache(maxsize=4)
+def _project_counts_template(by_session: bool, by_range: bool) -> str:
+    """SQL text for _project_counts_sql; only depends on module constants."""
+    roots = ", ".join("(?, ?)" for _ in PROJECT_ROOTS)
+    session_filter = "AND m.session_id = ?" if by_session else ""
+    range_filter = "AND tu.id > ? AND tu.id <= ?" if by_range else ""
+    excluded = ", ".join("?" for _ in EXCLUDED_NAMES)
+    return f"""
+        WITH project_prefixes(prefix, plen) AS (
+            VALUES {roots}
+        ),
+        file_paths AS (
+            SELECT
+                tu.id,
+                m.session_id,
+                json_extract(tu.tool_input, '$.file_path') as file_path
+            FROM messages m
+            JOIN tool_usages tu ON m.id = tu.message_id
+            WHERE tu.tool_name IN ('Read', 'Edit', 'Write', 'Glob', 'Grep')
+              AND json_extract(tu.tool_input, '$.file_path') IS NOT NULL
+              AND json_extract(tu.tool_input, '$.file_path') NOT LIKE '/var/folders/%'
+              AND json_extract(tu.tool_input, '$.file_path') NOT LIKE '/tmp/%'
+              {session_filter}
+              {range_filter}
+        ),
+        matched AS (
+            -- SQLite takes the bare columns from the row with MAX(plen)
+            SELECT fp.session_id, fp.file_path, MAX(pp.plen) as plen
+            FROM file_paths fp
+            JOIN project_prefixes pp ON substr(fp.file_path, 1, pp.plen) = pp.prefix
+            GROUP BY fp.id
+        ),
+        extracted AS (
+            SELECT
+                session_id,
+                substr(file_path, plen + 1) as rest
+            FROM matched
+        ),
+        projects AS (
+            SELECT
+                session_id,
+                CASE WHEN instr(rest, '/') > 0
+                     THEN substr(rest, 1, instr(rest, '/') - 1)
+                     ELSE rest
+                END as project
+            FROM extracted
+        ),
+        project_counts AS (
+            SELECT
+                session_id,
+                project,
+                COUNT(*) as cnt
+            FROM projects
+            WHERE project != ''
+              AND project NOT IN ({excluded})
+            GROUP BY session_id, project
+        )
+    """
 
 
 def detect_all_projects() -> dict[str, str]:
     """Detect projects for all sessions with tool_usages.
 
+    Reads the per-session counts materialized in session_project_counts,
+    after folding in any tool_usages added since the last call.
+
     Returns:
         dict mapping session_id -> detected_project
     """
-    conn = get_connection()
+    conn = _conn()
     cur = conn.cursor()
 
-    case_expr = _build_sqlite_case_expression()
-    excluded_list = ", ".join(f"'{name}'" for name in EXCLUDED_NAMES)
-
     try:
-        query = f"""
-            WITH file_paths AS (
-                SELECT
-                    m.session_id,
-                    json_extract(tu.tool_input, '$.file_path') as file_path
-                FROM messages m
-                JOIN tool_usages tu ON m.id = tu.message_id
-                WHERE tu.tool_name IN ('Read', 'Edit', 'Write', 'Glob', 'Grep')
-                  AND json_extract(tu.tool_input, '$.file_path') IS NOT NULL
-                  AND json_extract(tu.tool_input, '$.file_path') NOT LIKE '/var/folders/%'
-                  AND json_extract(tu.tool_input, '$.file_path') NOT LIKE '/tmp/%'
-            ),
-            extracted AS (
-                SELECT
-                    session_id,
-                    {case_expr} as project
-                FROM file_paths
-            ),
-            project_counts AS (
-                SELECT
-                    session_id,
-                    project,
-                    COUNT(*) as cnt
-                FROM extracted
-                WHERE project IS NOT NULL
-                  AND project != ''
-                  AND project NOT IN ({excluded_list})
-                GROUP BY session_id, project
-            ),
-            ranked AS (
+        _refresh_project_counts(conn, cur)
+
+        cur.execute("""
+            WITH ranked AS (
                 SELECT
                     session_id,
                     project,
                     ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY cnt DESC) as rn
-                FROM project_counts
+                FROM session_project_counts
             )
             SELECT session_id, project
             FROM ranked
             WHERE rn = 1
-        """
-        cur.execute(query)
+        """)
 
         return {row['session_id']: row['project'] for row in cur.fetchall()}
 
     finally:
         cur.close()
-        conn.close()
+
+
+def _read_watermark(cur) -> int:
+    cur.execute("SELECT max_tool_usage_id FROM project_detection_state WHERE id = 1")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def _max_tool_usage_id(cur) -> int:
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM tool_usages")
+    return cur.fetchone()[0]
+
+
+def _refresh_project_counts(conn, cur) -> None:
+    """Add counts for tool_usages past the stored watermark.
+
+    tool_usages ids only grow, so the rows counted so far are exactly those
+    with id <= max_tool_usage_id. If the table has shrunk below the
+    watermark the counts are rebuilt from scratch. Deleted sessions drop
+    out through the foreign key.
+
+    The watermark is re-read under BEGIN IMMEDIATE so concurrent callers
+    never add the same id range twice. If another writer (usually an
+    ingest) holds the lock, the refresh is skipped and the existing counts
+    are served as they are.
+    """
+    if _read_watermark(cur) == _max_tool_usage_id(cur):
+        return
+
+    conn.execute(f"PRAGMA busy_timeout = {_REFRESH_BUSY_TIMEOUT_MS}")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+    except sqlite3.OperationalError:
+        return
+    finally:
+        conn.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+
+    try:
+        watermark = _read_watermark(cur)
+        max_id = _max_tool_usage_id(cur)
+        if max_id == watermark:
+            conn.rollback()
+            return
+        if max_id < watermark:
+            cur.execute("DELETE FROM session_project_counts")
+            watermark = 0
+
+        sql, params = _project_counts_sql(id_range=(watermark, max_id))
+        # WHERE true keeps SQLite from parsing ON CONFLICT as a join clause
+        cur.execute(f"""
+            {sql}
+            INSERT INTO session_project_counts (session_id, project, cnt)
+            SELECT session_id, project, cnt
+            FROM project_counts
+            WHERE true
+            ON CONFLICT (session_id, project) DO UPDATE
+            SET cnt = cnt + excluded.cnt
+        """, params)
+        cur.execute("""
+            INSERT INTO project_detection_state (id, max_tool_usage_id, updated_at)
+            VALUES (1, ?, ?)
+            ON CONFLICT (id) DO UPDATE
+            SET max_tool_usage_id = excluded.max_tool_usage_id,
+                updated_at = excluded.updated_at
+        """, (max_id, datetime.now(timezone.utc).isoformat()))
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
 
 
 def backfill_detected_projects(dry_run: bool = False) -> dict:
@@ -210,7 +337,7 @@ def backfill_detected_projects(dry_run: bool = False) -> dict:
     if not detected:
         return {"detected": 0, "updated": 0, "skipped": 0}
 
-    conn = get_connection()
+    conn = _conn()
     cur = conn.cursor()
 
     try:
@@ -236,40 +363,47 @@ def backfill_detected_projects(dry_run: bool = False) -> dict:
                 "projects": dict(Counter(detected.values())),
             }
 
-        updated = 0
-        inserted = 0
-
-        for session_id, info in to_update.items():
-            if info['action'] == 'update':
-                cur.execute("""
-                    UPDATE session_summaries
-                    SET detected_project = ?
-                    WHERE session_id = ?
-                """, (info['project'], session_id))
-                updated += 1
-            else:
-                cur.execute("""
-                    INSERT INTO session_summaries
-                        (session_id, detected_project, generated_at)
-                    VALUES (?, ?, ?)
-                    ON CONFLICT (session_id) DO UPDATE
-                    SET detected_project = excluded.detected_project
-                """, (session_id, info['project'], datetime.now(timezone.utc).isoformat()))
-                inserted += 1
-
+        now = datetime.now(timezone.utc).isoformat()
+        updates = [
+            (info['project'], session_id)
+            for session_id, info in to_update.items() if info['action'] == 'update'
+        ]
+        inserts = [
+            (session_id, info['project'], now)
+            for session_id, info in to_update.items() if info['action'] == 'insert'
+        ]
+
+        # One write transaction for the whole backfill. The connection
+        # outlives this call, so never leave the transaction open.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur.executemany("""
+                UPDATE session_summaries
+                SET detected_project = ?
+                WHERE session_id = ?
+            """, updates)
+            cur.executemany("""
+                INSERT INTO session_summaries
+                    (session_id, detected_project, generated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE
+                SET detected_project = excluded.detected_project
+            """, inserts)
+        except Exception:
+            conn.rollback()
+            raise
         conn.commit()
 
         return {
             "detected": len(detected),
-            "updated": updated,
-            "inserted": inserted,
+            "updated": len(updates),
+            "inserted": len(inserts),
             "skipped": len(detected) - len(to_update),
             "projects": dict(Counter(detected.values())),
         }
 
     finally:
         cur.close()
-        conn.close()
 
 
 def get_project_summary() -> list[dict]:
@@ -291,7 +425,7 @@ if __name__ == "__main__":
 
     print("Detecting projects from file paths...\n")
     print(f"Home directory: {HOME_DIR}")
-    print(f"Project roots: {PROJECT_ROOTS}\n")
+    print(f"Project roots: {[prefix for prefix, _ in PROJECT_ROOTS]}\n")
 
     result = backfill_detected_projects(dry_run=True)
     print("Dry run results:")
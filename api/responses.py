@@ -0,0 +1,142 @@
+"""Response classes and serialization helpers for the dashboard API.
+
+The graph and tool endpoints return thousands of plain dicts per call, so
+they serialize with orjson instead of stdlib json + jsonable_encoder.
+Clients that send ``Accept: application/msgpack`` get MessagePack instead,
+and /graph can also be fetched as an Arrow IPC stream when pyarrow is
+installed.
+"""
+import hashlib
+from itertools import islice
+from typing import Iterable, Iterator
+
+import orjson
+import ormsgpack
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # optional: pip install pyarrow
+    pa = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_AVAILABLE = pa is not None
+
+# Items serialized per chunk when streaming large JSON bodies
+STREAM_BATCH = 5000
+
+# Server-sent event framing, pre-encoded once
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson.
+
+    Returning an instance directly from a route skips FastAPI's
+    jsonable_encoder pass over the payload.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+class MsgPackResponse(Response):
+    """MessagePack response rendered by ormsgpack."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return ormsgpack.packb(
+            content,
+            option=ormsgpack.OPT_NON_STR_KEYS | ormsgpack.OPT_SERIALIZE_NUMPY,
+        )
+
+
+class ArrowResponse(Response):
+    """Arrow IPC stream response, one row per top-level key.
+
+    List-of-dict values become list<struct> columns, so node and edge
+    fields are laid out column by column rather than as JSON records.
+    Requires pyarrow; check ARROW_AVAILABLE first.
+    """
+
+    media_type = ARROW_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        table = pa.Table.from_pydict({key: [value] for key, value in content.items()})
+        sink = pa.BufferOutputStream()
+        with pa_ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True if the client asked for MessagePack via the Accept header."""
+    return MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def negotiated_response(request: Request, content) -> Response:
+    """Return MessagePack or JSON depending on the request's Accept header."""
+    if wants_msgpack(request):
+        return MsgPackResponse(content)
+    return ORJSONResponse(content)
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag for a rendered response body."""
+    return '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def conditional_response(request: Request, response: Response, cache_control: str) -> Response:
+    """Tag a rendered response with a content ETag, or return 304 if it matches.
+
+    The client gets headers only when its If-None-Match is still current.
+    Both the 200 and the 304 carry `cache_control`.
+    """
+    etag = content_etag(response.body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+def sse_event(payload) -> bytes:
+    """Encode a payload as a single SSE `data:` event."""
+    return _SSE_PREFIX + orjson.dumps(payload) + _SSE_SUFFIX
+
+
+def json_members(pairs: Iterable[tuple]) -> Iterator[bytes]:
+    """Yield comma-separated JSON object members for (key, value) pairs.
+
+    Pairs are encoded STREAM_BATCH at a time, so the caller never holds the
+    whole serialized object. Wrap the output in b"{" ... b"}" yourself.
+    """
+    pairs = iter(pairs)
+    sep = b""
+    while batch := dict(islice(pairs, STREAM_BATCH)):
+        yield sep + orjson.dumps(batch, option=orjson.OPT_NON_STR_KEYS)[1:-1]
+        sep = b","
+
+
+def json_elements(items: Iterable) -> Iterator[bytes]:
+    """Yield comma-separated JSON array elements, STREAM_BATCH at a time."""
+    items = iter(items)
+    sep = b""
+    while batch := list(islice(items, STREAM_BATCH)):
+        yield sep + orjson.dumps(batch)[1:-1]
+        sep = b","
+
+
+def ndjson_lines(items: Iterable) -> Iterator[bytes]:
+    """Yield newline-delimited JSON, one value per line, STREAM_BATCH at a time."""
+    items = iter(items)
+    while batch := list(islice(items, STREAM_BATCH)):
+        yield b"".join(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE) for item in batch)
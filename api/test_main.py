@@ -1,9 +1,46 @@
 """Smoke tests for the dashboard API."""
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
 from fastapi.testclient import TestClient
 from main import app
 
 client = TestClient(app)
 
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schema.sqlite.sql"
+
+
+@pytest.fixture
+def seeded_db(tmp_path, monkeypatch):
+    """Point the API at a fresh schema-initialised database; returns a seeding connection."""
+    import main
+    from db import queries
+    db_path = tmp_path / "dashboard.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    monkeypatch.setattr(queries, "DB_PATH", str(db_path))
+    main._query_cache.clear()
+    yield conn
+    conn.close()
+    main._query_cache.clear()
+
+
+def _seed_session(conn, session_id: str, n_messages: int) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    conn.execute(
+        "INSERT INTO sessions (session_id, cwd, start_time) VALUES (?, ?, ?)",
+        (session_id, "/tmp/project", now),
+    )
+    conn.executemany(
+        "INSERT INTO messages (session_id, role, content, sequence_num, timestamp) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(session_id, "user" if i % 2 == 0 else "assistant", f"msg {i}", i, now)
+         for i in range(n_messages)],
+    )
+    conn.commit()
+
 
 def test_health():
     r = client.get("/health")
@@ -27,3 +64,210 @@ def test_semantic_filters_list():
     r = client.get("/semantic-filters")
     assert r.status_code == 200
     assert "filters" in r.json()
+
+
+def test_graph_msgpack():
+    import ormsgpack
+    r = client.get("/graph?hours=1", headers={"Accept": "application/msgpack"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/msgpack"
+    assert "nodes" in ormsgpack.unpackb(r.content)
+
+
+def test_graph_arrow():
+    from responses import ARROW_AVAILABLE
+    r = client.get("/graph?hours=1&format=arrow")
+    if not ARROW_AVAILABLE:
+        assert r.status_code == 501
+        return
+    import pyarrow.ipc
+    assert r.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert "nodes" in pyarrow.ipc.open_stream(r.content).read_all().column_names
+
+
+def test_graph_ndjson():
+    import json
+    r = client.get("/graph?hours=1&format=ndjson")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert "node_count" in json.loads(r.text.splitlines()[-1])
+
+
+def test_session_messages_ndjson(seeded_db):
+    import json
+    _seed_session(seeded_db, "s1", 2500)
+    r = client.get("/session/s1/messages?format=ndjson")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["sequence_num"] for row in rows] == list(range(2500))
+    assert rows == client.get("/session/s1/messages").json()["messages"]
+
+
+def test_rescore_stream_counts_completed_sessions(monkeypatch):
+    import json
+    import main
+
+    class FakeManager:
+        def get_or_create_context(self, session_id):
+            return object(), False
+
+    class FakeScorer:
+        def score_session(self, session_id, context, batch_size, force):
+            return [0.5] * 2
+
+    monkeypatch.setattr(main, "get_context_manager", lambda staleness_days: FakeManager())
+    monkeypatch.setattr(main, "get_scorer", lambda: FakeScorer())
+    ids = [f"session-{i}" for i in range(6)]
+    r = client.post("/importance/rescore/stream", json={"session_ids": ids})
+    events = [json.loads(line[len("data: "):]) for line in r.text.split("\n\n") if line]
+    progress = [e for e in events if e["type"] == "progress"]
+    assert [e["current"] for e in progress] == list(range(1, 7))
+    assert all(e["total"] == 6 for e in progress)
+    assert events[-1]["messages_rescored"] == 12
+
+
+def test_llm_client_created_once_under_concurrency(monkeypatch):
+    import sys
+    import threading
+    import time
+    import types
+    from db import llm
+
+    created = []
+
+    def slow_client(**kwargs):
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(OpenAI=slow_client))
+    monkeypatch.setattr(llm, "_detect_provider", lambda: ("litellm", "fast"))
+    llm.reset()
+    barrier = threading.Barrier(8)
+    seen = []
+
+    def worker():
+        barrier.wait()
+        seen.append(llm._get_client()[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        llm.reset()
+    assert len(created) == 1
+    assert seen == created * 8
+
+
+def test_ingest_reports_session_errors(monkeypatch, tmp_path):
+    import types
+    import main
+
+    def run_ingest(claude_dir, db_path, since, out, timeout):
+        print("  [1/2] abcd1234... ERROR: bad transcript", file=out)
+        return {"sessions": 1, "messages": 3, "tools": 0, "errors": 1, "timed_out": False}
+
+    fake = types.SimpleNamespace(
+        DEFAULT_CLAUDE_DIR=tmp_path, parse_since=lambda since: None, run_ingest=run_ingest,
+    )
+    monkeypatch.setattr(main, "_ingest_module", lambda: fake)
+    r = client.post("/ingest?since=1h")
+    assert r.status_code == 200
+    assert r.json()["errors"] == 1
+    assert "ERROR: bad transcript" in r.json()["output"]
+
+
+def test_gzip_skips_small_responses():
+    r = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert "content-encoding" not in r.headers
+
+
+def test_graph_delta_since_id():
+    r = client.get("/graph?hours=1&since_id=0")
+    assert r.status_code == 200
+    assert "max_id" in r.json()
+
+
+def test_graph_delta_returns_only_new_nodes(seeded_db):
+    _seed_session(seeded_db, "s1", 3)
+    _seed_session(seeded_db, "s2", 2)
+    first = client.get("/graph?hours=1").json()
+    assert first["node_count"] == 5
+
+    now = datetime.now(timezone.utc).isoformat()
+    seeded_db.executemany(
+        "INSERT INTO messages (session_id, role, content, sequence_num, timestamp) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [("s1", "user", "new 3", 3, now), ("s1", "assistant", "new 4", 4, now)],
+    )
+    seeded_db.commit()
+    last_s1 = {n["id"] for n in first["nodes"] if n["session_id"] == "s1"}
+    predecessor = max(last_s1, key=int)
+
+    delta = client.get(f"/graph?hours=1&since_id={first['max_id']}").json()
+    new_ids = [n["id"] for n in delta["nodes"]]
+    assert len(new_ids) == 2
+    assert all(int(i) > first["max_id"] for i in new_ids)
+    assert delta["max_id"] == max(int(i) for i in new_ids)
+    edges = {(e["source"], e["target"]) for e in delta["edges"]}
+    assert edges == {(predecessor, new_ids[0]), (new_ids[0], new_ids[1])}
+
+
+def test_proximity_edges_streamed_json(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "search_by_query", lambda q: {1: 0.5, 2: 0.55})
+    r = client.post("/embeddings/proximity-edges", json={"query_text": "x"})
+    assert r.status_code == 200
+    assert r.json() == {
+        "edges": [{"source": "1", "target": "2", "strength": 0.5}],
+        "scores": {"1": 0.5, "2": 0.55},
+        "count": 1,
+        "query": "x",
+    }
+
+
+def test_sessions_etag_revalidation():
+    r = client.get("/sessions?hours=2")
+    etag = r.headers["etag"]
+    r = client.get("/sessions?hours=2", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+
+def test_etag_survives_cache_refresh():
+    import main
+    etag = client.get("/sessions?hours=3").headers["etag"]
+    main._query_cache.clear()
+    r = client.get("/sessions?hours=3", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+
+def test_session_summary_revalidation_sends_cache_control(seeded_db):
+    _seed_session(seeded_db, "s1", 1)
+    seeded_db.execute(
+        "INSERT INTO session_summaries (session_id, summary, topics) VALUES (?, ?, ?)",
+        ("s1", "did things", "[]"),
+    )
+    seeded_db.commit()
+    r = client.get("/session/s1/summary")
+    assert r.status_code == 200
+    cache_control = r.headers["cache-control"]
+    assert cache_control == client.get("/sessions?hours=1").headers["cache-control"]
+    r = client.get("/session/s1/summary", headers={"If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+    assert r.headers["cache-control"] == cache_control
+
+
+def test_stats_bulk():
+    r = client.get("/stats/bulk")
+    assert r.status_code == 200
+    assert set(r.json()) == {"importance", "semantic", "embeddings", "metrics"}
+
+
+def test_neighborhood_summary_rejects_non_numeric_ids():
+    r = client.post("/summary/neighborhood", json={"message_ids": ["12", "abc"]})
+    assert r.status_code == 422
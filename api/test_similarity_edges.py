@@ -4,6 +4,10 @@ Tests use synthetic normalized embedding matrices so they run without
 a database or API keys. We mock search_by_query to return controlled scores.
 """
 
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
 import numpy as np
 import pytest
 from unittest.mock import patch
@@ -16,20 +20,38 @@ from db.embeddings import compute_proximity_edges
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _edge_set(edges: list[tuple[int, int, float]]) -> set[tuple[int, int]]:
-    """Extract (src, tgt) pairs, ignoring strengths."""
-    return {(s, t) for s, t, _ in edges}
+def _edge_set(edges: list[tuple[int, int, float]]) -> set[int]:
+    """Extract (src, tgt) pairs packed as src << 32 | tgt, ignoring strengths."""
+    if not edges:
+        return set()
+    pairs = np.array([(src, tgt) for src, tgt, _ in edges], dtype=np.int64)
+    return set(((pairs[:, 0] << 32) | pairs[:, 1]).tolist())
+
+
+def _unpack_pairs(packed: set[int]) -> set[tuple[int, int]]:
+    """Decode _edge_set output back to (src, tgt) pairs for messages."""
+    return {(p >> 32, p & 0xFFFFFFFF) for p in packed}
 
 
-def _make_scores(n: int, score_fn=None) -> dict[int, float]:
-    """Build a scores dict mapping message_id -> score.
+@pytest.fixture
+def mocked_search(monkeypatch):
+    """Return a setter that makes search_by_query return the given scores."""
+    def _set(scores: dict[int, float]) -> None:
+        monkeypatch.setattr("db.embeddings.search_by_query", lambda *_args, **_kwargs: scores)
+    return _set
+
+
+@lru_cache(maxsize=None)
+def _make_scores(n: int, score_fn=None) -> Mapping[int, float]:
+    """Build a read-only scores mapping message_id -> score.
 
     score_fn(i, n) returns score for message i (0-indexed).
-    Default: linearly spaced 0.0 to 1.0.
+    Default: linearly spaced 0.0 to 1.0. Results are cached and shared
+    between tests, hence the read-only view.
     """
     if score_fn is None:
         score_fn = lambda i, n: i / max(n - 1, 1)
-    return {i + 1: score_fn(i, n) for i in range(n)}
+    return MappingProxyType({i + 1: score_fn(i, n) for i in range(n)})
 
 
 # ---------------------------------------------------------------------------
@@ -39,22 +61,22 @@ def _make_scores(n: int, score_fn=None) -> dict[int, float]:
 class TestBasicEdges:
     """Proximity edges link nodes within delta of each other."""
 
-    def test_all_same_score_fully_connected(self):
+    def test_all_same_score_fully_connected(self, mocked_search):
         """When all nodes have the same score, all pairs within delta."""
         scores = {1: 0.5, 2: 0.5, 3: 0.5, 4: 0.5}
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.1)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.1)
 
         # 4 nodes all at same score → C(4,2) = 6 edges
         assert result["count"] == 6
         assert len(result["edges"]) == 6
 
-    def test_two_clusters_no_cross_edges(self):
+    def test_two_clusters_no_cross_edges(self, mocked_search):
         """Two clusters separated by more than delta produce no cross-edges."""
         scores = {1: 0.0, 2: 0.01, 3: 0.02,   # low cluster
                   4: 0.5, 5: 0.51, 6: 0.52}     # high cluster
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.05)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.05)
 
         edges = result["edges"]
         # All edges should be within-cluster
@@ -64,18 +86,18 @@ class TestBasicEdges:
             same_cluster = (src in low and tgt in low) or (src in high and tgt in high)
             assert same_cluster, f"Cross-cluster edge ({src}, {tgt})"
 
-    def test_empty_scores_returns_empty(self):
+    def test_empty_scores_returns_empty(self, mocked_search):
         """No scores → no edges."""
-        with patch("db.embeddings.search_by_query", return_value={}):
-            result = compute_proximity_edges("test")
+        mocked_search({})
+        result = compute_proximity_edges("test")
         assert result["count"] == 0
         assert result["edges"] == []
         assert result["scores"] == {}
 
-    def test_single_node_no_edges(self):
+    def test_single_node_no_edges(self, mocked_search):
         """One node can't form edges."""
-        with patch("db.embeddings.search_by_query", return_value={1: 0.5}):
-            result = compute_proximity_edges("test")
+        mocked_search({1: 0.5})
+        result = compute_proximity_edges("test")
         assert result["count"] == 0
 
 
@@ -83,27 +105,30 @@ class TestBasicEdges:
 # 2. Delta monotonicity
 # ---------------------------------------------------------------------------
 
+_MONOTONIC_DELTAS = [0.02, 0.05, 0.1, 0.2, 0.5]
+
+
+@pytest.fixture(scope="module")
+def edges_by_delta():
+    """Edge sets for each delta in _MONOTONIC_DELTAS, computed once."""
+    scores = _make_scores(20)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("db.embeddings.search_by_query", lambda *_args, **_kwargs: scores)
+        return {
+            d: _edge_set(compute_proximity_edges("test", delta=d, max_edges=1_000_000)["edges"])
+            for d in _MONOTONIC_DELTAS
+        }
+
+
 class TestDeltaMonotonicity:
     """Increasing delta must produce a superset of edges."""
 
-    def test_larger_delta_is_superset(self):
-        scores = _make_scores(20)
-        deltas = [0.02, 0.05, 0.1, 0.2, 0.5]
-
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            prev_edges = None
-            prev_d = None
-            for d in deltas:
-                edges = _edge_set(
-                    compute_proximity_edges("test", delta=d, max_edges=1_000_000)["edges"]
-                )
-                if prev_edges is not None:
-                    assert prev_edges <= edges, (
-                        f"delta {d} lost edges from delta {prev_d}: "
-                        f"{prev_edges - edges}"
-                    )
-                prev_edges = edges
-                prev_d = d
+    @pytest.mark.parametrize(
+        "small,large", list(zip(_MONOTONIC_DELTAS, _MONOTONIC_DELTAS[1:]))
+    )
+    def test_larger_delta_is_superset(self, edges_by_delta, small, large):
+        lost = edges_by_delta[small] - edges_by_delta[large]
+        assert not lost, f"delta {large} lost edges from delta {small}: {_unpack_pairs(lost)}"
 
 
 # ---------------------------------------------------------------------------
@@ -113,18 +138,18 @@ class TestDeltaMonotonicity:
 class TestStrength:
     """Edge strength = 1 - |score_diff| / delta."""
 
-    def test_same_score_has_strength_1(self):
+    def test_same_score_has_strength_1(self, mocked_search):
         scores = {1: 0.5, 2: 0.5}
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.1)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.1)
         assert len(result["edges"]) == 1
         _, _, strength = result["edges"][0]
-        assert strength == pytest.approx(1.0)
+        assert abs(strength - 1.0) <= 1e-6
 
-    def test_strength_decreases_with_distance(self):
+    def test_strength_decreases_with_distance(self, mocked_search):
         scores = {1: 0.5, 2: 0.55, 3: 0.59}
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.1)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.1)
 
         edge_dict = {(min(s, t), max(s, t)): st for s, t, st in result["edges"]}
 
@@ -132,22 +157,22 @@ class TestStrength:
         if (1, 2) in edge_dict and (1, 3) in edge_dict:
             assert edge_dict[(1, 2)] > edge_dict[(1, 3)]
 
-    def test_strength_is_zero_at_boundary(self):
+    def test_strength_is_zero_at_boundary(self, mocked_search):
         """Nodes exactly delta apart should have strength ≈ 0."""
         scores = {1: 0.5, 2: 0.6}  # diff = 0.1 = delta
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.1)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.1)
 
         # Should still produce an edge (diff <= delta), but strength ≈ 0
         assert len(result["edges"]) == 1
         _, _, strength = result["edges"][0]
-        assert strength == pytest.approx(0.0, abs=1e-6)
+        assert abs(strength) <= 1e-6
 
-    def test_all_strengths_in_range(self):
+    def test_all_strengths_in_range(self, mocked_search):
         """All edge strengths must be in [0.0, 1.0]."""
         scores = _make_scores(50)
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.1)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.1)
 
         for _, _, strength in result["edges"]:
             assert 0.0 <= strength <= 1.0 + 1e-6, f"Strength {strength} out of range"
@@ -160,20 +185,26 @@ class TestStrength:
 class TestMaxEdges:
     """max_edges caps the total returned edges."""
 
-    def test_cap_limits_count(self):
+    def test_cap_limits_count(self, mocked_search):
         scores = _make_scores(100)  # many nodes → many edges with delta=0.5
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.5, max_edges=10)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.5, max_edges=10)
         assert result["count"] <= 10
         assert len(result["edges"]) <= 10
 
-    def test_uncapped_returns_more(self):
+    def test_uncapped_returns_more(self, mocked_search):
         scores = _make_scores(50)
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            capped = compute_proximity_edges("test", delta=0.5, max_edges=5)
-            uncapped = compute_proximity_edges("test", delta=0.5, max_edges=1_000_000)
+        mocked_search(scores)
+        capped = compute_proximity_edges("test", delta=0.5, max_edges=5)
+        uncapped = compute_proximity_edges("test", delta=0.5, max_edges=1_000_000)
         assert uncapped["count"] >= capped["count"]
 
+    def test_cap_keeps_sweep_order_prefix(self, mocked_search):
+        mocked_search(_make_scores(50))
+        capped = compute_proximity_edges("test", delta=0.5, max_edges=5)
+        uncapped = compute_proximity_edges("test", delta=0.5, max_edges=1_000_000)
+        assert capped["edges"] == uncapped["edges"][:5]
+
 
 # ---------------------------------------------------------------------------
 # 5. Scores passthrough
@@ -182,10 +213,10 @@ class TestMaxEdges:
 class TestScoresPassthrough:
     """The returned scores dict should match what search_by_query provides."""
 
-    def test_scores_returned_unchanged(self):
+    def test_scores_returned_unchanged(self, mocked_search):
         scores = {1: 0.1, 2: 0.5, 3: 0.9}
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.1)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.1)
         assert result["scores"] == scores
 
 
@@ -196,13 +227,110 @@ class TestScoresPassthrough:
 class TestSymmetry:
     """Each pair appears only once (no duplicates)."""
 
-    def test_no_duplicate_pairs(self):
+    def test_no_duplicate_pairs(self, mocked_search):
         scores = _make_scores(20)
-        with patch("db.embeddings.search_by_query", return_value=scores):
-            result = compute_proximity_edges("test", delta=0.1)
-
-        seen = set()
-        for src, tgt, _ in result["edges"]:
-            pair = (min(src, tgt), max(src, tgt))
-            assert pair not in seen, f"Duplicate edge: {pair}"
-            seen.add(pair)
+        mocked_search(scores)
+        result = compute_proximity_edges("test", delta=0.1)
+
+        pairs = np.array([(src, tgt) for src, tgt, _ in result["edges"]], dtype=np.int64)
+        src, tgt = pairs[:, 0], pairs[:, 1]
+        packed = (np.minimum(src, tgt) << 32) | np.maximum(src, tgt)
+        unique, counts = np.unique(packed, return_counts=True)
+        dupes = [(int(p >> 32), int(p & 0xFFFFFFFF)) for p in unique[counts > 1]]
+        assert not dupes, f"Duplicate edges: {dupes}"
+
+
+# ---------------------------------------------------------------------------
+# 7. Query cache
+# ---------------------------------------------------------------------------
+
+class TestQueryCache:
+    """Repeated queries reuse the query embedding and score map."""
+
+    def test_repeat_query_skips_embedding_call(self):
+        from db import embeddings
+
+        fake_cache = {"message_ids": [1, 2], "matrix": np.eye(2, dtype=np.float32), "model": None}
+        embeddings._invalidate_cache()
+        with patch.object(embeddings, "_embedding_cache", fake_cache), \
+             patch("db.embeddings.embed_texts", return_value=[[1.0, 0.0]]) as embed:
+            first = embeddings.search_by_query("cache me")
+            second = embeddings.search_by_query("cache me")
+
+        assert embed.call_count == 1
+        assert first == second == {1: 1.0, 2: 0.0}
+        embeddings._invalidate_cache()
+
+
+# ---------------------------------------------------------------------------
+# 8. Array output
+# ---------------------------------------------------------------------------
+
+class TestEdgeArrays:
+    """proximity_edge_arrays returns the same edges as parallel arrays."""
+
+    @pytest.mark.parametrize("n,max_neighbors", [(50, 0), (50, 3), (2000, 0)])
+    def test_arrays_match_tuples(self, n, max_neighbors):
+        from db.embeddings import proximity_edge_arrays, proximity_edges_from_scores
+
+        scores = _make_scores(n, lambda i, n: (i * 7919 % n) / n)
+        src, tgt, strength = proximity_edge_arrays(scores, 0.05, 5000, max_neighbors)
+        expected = proximity_edges_from_scores(scores, 0.05, 5000, max_neighbors)
+
+        assert list(zip(src.tolist(), tgt.tolist(), strength.tolist())) == expected
+
+    @pytest.mark.parametrize("step", [None, 0.01, 0.05])
+    @pytest.mark.parametrize("delta,max_edges", [(0.0, 5000), (0.05, 5000), (0.1, 5000), (0.05, 137)])
+    def test_vectorized_window_matches_scalar_loop(self, monkeypatch, step, delta, max_edges):
+        """_window_edge_arrays reproduces the scalar uncapped loop exactly.
+
+        Quantized scores put gaps of exactly delta between nodes, where the
+        searchsorted window starts need nudging to agree with the loop.
+        """
+        from db import embeddings
+
+        if step is None:
+            score_fn = lambda i, n: (i * 7919 % n) / n
+        else:
+            score_fn = lambda i, n: round((i * 7919 % n) / n / step) * step
+        scores = _make_scores(300, score_fn)
+
+        monkeypatch.setattr(embeddings, "_VECTOR_EDGES_MIN_NODES", 10**9)
+        expected = embeddings.proximity_edges_from_scores(scores, delta, max_edges)
+        src, tgt, strength = embeddings._window_edge_arrays(scores, delta, max_edges)
+
+        assert expected or (delta == 0 and step is None)  # distinct scores, no ties
+        assert list(zip(src.tolist(), tgt.tolist(), strength.tolist())) == expected
+
+
+# ---------------------------------------------------------------------------
+# 9. Degree-capped kernel
+# ---------------------------------------------------------------------------
+
+class TestCappedKernel:
+    """The numba kernel's Python source matches the degree-capped loop.
+
+    numba is optional, so the undecorated _sweep_capped is swapped in for
+    the compiled one; this pins the kernel logic wherever the tests run.
+    """
+
+    @pytest.mark.parametrize("n,delta,max_neighbors,max_edges", [
+        (60, 0.05, 3, 5000),
+        (60, 0.0, 2, 5000),
+        (200, 0.1, 4, 37),
+        (200, 0.5, 1, 5000),
+        (1, 0.1, 2, 10),
+    ])
+    def test_kernel_matches_loop(self, monkeypatch, n, delta, max_neighbors, max_edges):
+        from db import embeddings
+        from db.embeddings_numba import _sweep_capped
+
+        # Quantized to 0.05 steps so that ties and exact-delta gaps both occur
+        scores = _make_scores(n, lambda i, n: round((i * 7919 % n) / n * 20) / 20)
+        monkeypatch.setattr(embeddings, "sweep_capped", None)
+        expected = embeddings.proximity_edges_from_scores(scores, delta, max_edges, max_neighbors)
+        monkeypatch.setattr(embeddings, "sweep_capped", _sweep_capped)
+        actual = embeddings.proximity_edges_from_scores(scores, delta, max_edges, max_neighbors)
+
+        assert actual == expected
+        assert len(expected) > 0 or n == 1
@@ -11,62 +11,88 @@ from db.filter_engine import compute_visible_set, _bfs_expand, _build_adjacency_
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def _hours_ago(h: float) -> str:
     return (datetime.now(timezone.utc) - timedelta(hours=h)).isoformat()
 
 
+# Seed timestamp, computed once: every test queries a 24h window, so an
+# hour-old stamp stays in range for the life of the run
+_TS_HOUR_AGO = _hours_ago(1)
+
+
+# Minimal schema needed for filter engine tests
+_SCHEMA_DDL = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id  TEXT PRIMARY KEY,
+        cwd         TEXT NOT NULL,
+        start_time  TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+
+    CREATE TABLE IF NOT EXISTS messages (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id   TEXT NOT NULL,
+        role         TEXT NOT NULL,
+        content      TEXT NOT NULL,
+        sequence_num INTEGER NOT NULL,
+        timestamp    TEXT DEFAULT (datetime('now')),
+        FOREIGN KEY (session_id) REFERENCES sessions (session_id),
+        UNIQUE (session_id, sequence_num)
+    );
+
+    CREATE TABLE IF NOT EXISTS semantic_filters (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        name        TEXT NOT NULL,
+        query_text  TEXT NOT NULL,
+        filter_type TEXT NOT NULL DEFAULT 'semantic',
+        created_at  TEXT NOT NULL DEFAULT (datetime('now')),
+        is_active   INTEGER NOT NULL DEFAULT 1,
+        UNIQUE (name)
+    );
+
+    CREATE TABLE IF NOT EXISTS semantic_filter_results (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        filter_id   INTEGER NOT NULL,
+        message_id  INTEGER NOT NULL,
+        matches     INTEGER NOT NULL,
+        confidence  REAL,
+        scored_at   TEXT NOT NULL DEFAULT (datetime('now')),
+        FOREIGN KEY (filter_id) REFERENCES semantic_filters (id),
+        FOREIGN KEY (message_id) REFERENCES messages (id),
+        UNIQUE (filter_id, message_id)
+    );
+
+    -- Match the production indexes compute_visible_set relies on;
+    -- (session_id, sequence_num) is already covered by the UNIQUE above
+    CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp);
+    CREATE INDEX IF NOT EXISTS idx_sfr_filter_matches
+        ON semantic_filter_results (filter_id, matches, message_id);
+"""
+
+
 def _create_schema(conn: sqlite3.Connection):
     """Create the minimal schema needed for filter engine tests."""
+    conn.executescript(_SCHEMA_DDL)
+
+
+def _open() -> sqlite3.Connection:
+    """Open an empty in-memory connection tuned for throwaway test data."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    # Nothing here needs to survive a crash: skip journaling/fsync work and
+    # keep compute_visible_set's sorts and temp b-trees off disk
     conn.executescript("""
-        CREATE TABLE IF NOT EXISTS sessions (
-            session_id  TEXT PRIMARY KEY,
-            cwd         TEXT NOT NULL,
-            start_time  TEXT NOT NULL DEFAULT (datetime('now'))
-        );
-
-        CREATE TABLE IF NOT EXISTS messages (
-            id           INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id   TEXT NOT NULL,
-            role         TEXT NOT NULL,
-            content      TEXT NOT NULL,
-            sequence_num INTEGER NOT NULL,
-            timestamp    TEXT DEFAULT (datetime('now')),
-            FOREIGN KEY (session_id) REFERENCES sessions (session_id),
-            UNIQUE (session_id, sequence_num)
-        );
-
-        CREATE TABLE IF NOT EXISTS semantic_filters (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            name        TEXT NOT NULL,
-            query_text  TEXT NOT NULL,
-            filter_type TEXT NOT NULL DEFAULT 'semantic',
-            created_at  TEXT NOT NULL DEFAULT (datetime('now')),
-            is_active   INTEGER NOT NULL DEFAULT 1,
-            UNIQUE (name)
-        );
-
-        CREATE TABLE IF NOT EXISTS semantic_filter_results (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            filter_id   INTEGER NOT NULL,
-            message_id  INTEGER NOT NULL,
-            matches     INTEGER NOT NULL,
-            confidence  REAL,
-            scored_at   TEXT NOT NULL DEFAULT (datetime('now')),
-            FOREIGN KEY (filter_id) REFERENCES semantic_filters (id),
-            FOREIGN KEY (message_id) REFERENCES messages (id),
-            UNIQUE (filter_id, message_id)
-        );
+        PRAGMA journal_mode = MEMORY;
+        PRAGMA synchronous = OFF;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA locking_mode = EXCLUSIVE;
+        PRAGMA cache_size = -4000;
     """)
+    return conn
 
 
 def _make_conn() -> sqlite3.Connection:
     """Create an in-memory SQLite connection with Row factory and schema."""
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
+    conn = _open()
     _create_schema(conn)
     return conn
 
@@ -85,26 +111,35 @@ def _seed_graph(conn: sqlite3.Connection):
       1 -- 2 -- 3 -- 4 -- 5
       6 -- 7 -- 8 -- 9 -- 10
     """
-    ts = _hours_ago(1)  # All messages within the last hour
-
-    conn.execute("INSERT INTO sessions VALUES ('sess-a', '/proj/a', ?)", (ts,))
-    conn.execute("INSERT INTO sessions VALUES ('sess-b', '/proj/b', ?)", (ts,))
-
-    for i in range(1, 6):
-        role = "user" if i % 2 == 1 else "assistant"
-        conn.execute(
+    ts = _TS_HOUR_AGO  # All messages within the last hour
+
+    messages = [
+        (i, "sess-a", "user" if i % 2 == 1 else "assistant", f"message {i}", i, ts)
+        for i in range(1, 6)
+    ] + [
+        (i, "sess-b", "user" if i % 2 == 0 else "assistant", f"message {i}", i - 5, ts)
+        for i in range(6, 11)
+    ]
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO sessions VALUES (?, ?, ?)",
+            [("sess-a", "/proj/a", ts), ("sess-b", "/proj/b", ts)],
+        )
+        conn.executemany(
             "INSERT INTO messages (id, session_id, role, content, sequence_num, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-            (i, "sess-a", role, f"message {i}", i, ts),
+            messages,
         )
 
-    for i in range(6, 11):
-        role = "user" if i % 2 == 0 else "assistant"
-        conn.execute(
-            "INSERT INTO messages (id, session_id, role, content, sequence_num, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-            (i, "sess-b", role, f"message {i}", i - 5, ts),
-        )
 
-    conn.commit()
+# Every message id in _seed_graph
+ALL_IDS = frozenset(range(1, 11))
+
+# Adjacency that _build_adjacency_list produces for _seed_graph
+LINEAR_ADJ = {
+    1: [2], 2: [1, 3], 3: [2, 4], 4: [3, 5], 5: [4],
+    6: [7], 7: [6, 8], 8: [7, 9], 9: [8, 10], 10: [9],
+}
 
 
 def _seed_filters(conn: sqlite3.Connection):
@@ -113,35 +148,83 @@ def _seed_filters(conn: sqlite3.Connection):
     Filter 1 ("code-review"): matches messages 2, 4, 7
     Filter 2 ("debugging"):   matches messages 3, 8, 9
     """
-    conn.execute(
-        "INSERT INTO semantic_filters (id, name, query_text) VALUES (1, 'code-review', 'code review discussions')"
-    )
-    conn.execute(
-        "INSERT INTO semantic_filters (id, name, query_text) VALUES (2, 'debugging', 'debugging sessions')"
+    results = (
+        # Filter 1 matches: 2, 4, 7
+        [(1, mid, 1, 0.9) for mid in [2, 4, 7]]
+        # Filter 2 matches: 3, 8, 9
+        + [(2, mid, 1, 0.9) for mid in [3, 8, 9]]
+        # Also add some non-matches to make sure they're excluded
+        + [(1, mid, 0, 0.1) for mid in [1, 5, 6]]
     )
 
-    # Filter 1 matches: 2, 4, 7
-    for mid in [2, 4, 7]:
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches, confidence) VALUES (1, ?, 1, 0.9)",
-            (mid,),
+    with conn:
+        conn.executemany(
+            "INSERT INTO semantic_filters (id, name, query_text) VALUES (?, ?, ?)",
+            [(1, "code-review", "code review discussions"), (2, "debugging", "debugging sessions")],
         )
-
-    # Filter 2 matches: 3, 8, 9
-    for mid in [3, 8, 9]:
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches, confidence) VALUES (2, ?, 1, 0.9)",
-            (mid,),
+        conn.executemany(
+            "INSERT INTO semantic_filter_results (filter_id, message_id, matches, confidence) VALUES (?, ?, ?, ?)",
+            results,
         )
 
-    # Also add some non-matches to make sure they're excluded
-    for mid in [1, 5, 6]:
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches, confidence) VALUES (1, ?, 0, 0.1)",
-            (mid,),
+
+def _add_filters(conn: sqlite3.Connection, matches: dict[int, list[int]]):
+    """Add one filter per key, each matching exactly its listed message ids."""
+    with conn:
+        conn.executemany(
+            "INSERT INTO semantic_filters (id, name, query_text) VALUES (?, ?, 'q')",
+            [(filter_id, f"f{filter_id}") for filter_id in matches],
         )
+        conn.executemany(
+            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (?, ?, 1)",
+            [(filter_id, mid) for filter_id, mids in matches.items() for mid in mids],
+        )
+
+
+def _add_filter(conn: sqlite3.Connection, filter_id: int, matching_ids: list[int]):
+    """Add a filter that matches exactly matching_ids."""
+    _add_filters(conn, {filter_id: matching_ids})
+
+
+def _clone(template: sqlite3.Connection) -> sqlite3.Connection:
+    """Copy a seeded template into a fresh in-memory connection."""
+    conn = _open()
+    template.backup(conn)
+    return conn
+
+
+@pytest.fixture(scope="session")
+def graph_template():
+    """Schema + _seed_graph, built once and cloned per test."""
+    conn = _make_conn()
+    _seed_graph(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def filters_template(graph_template):
+    """graph_template + _seed_filters, built once and cloned per test."""
+    conn = _clone(graph_template)
+    _seed_filters(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def graph_conn(graph_template):
+    """Fresh copy of the seeded graph, without filters."""
+    conn = _clone(graph_template)
+    yield conn
+    conn.close()
 
-    conn.commit()
+
+@pytest.fixture
+def conn(filters_template):
+    """Fresh copy of the seeded graph and the two test filters."""
+    conn = _clone(filters_template)
+    yield conn
+    conn.close()
 
 
 # ---------------------------------------------------------------------------
@@ -151,11 +234,7 @@ def _seed_filters(conn: sqlite3.Connection):
 class TestAllFiltersOff:
     """When all filters are off, no filtering should be applied."""
 
-    def test_returns_none_visible_ids(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
+    def test_returns_none_visible_ids(self, conn):
         result = compute_visible_set(
             filter_modes={1: "off", 2: "off"},
             hours=24,
@@ -166,9 +245,8 @@ class TestAllFiltersOff:
         assert result["total_nodes"] == 10
         assert result["visible_count"] == 10
 
-    def test_empty_filter_modes(self):
-        conn = _make_conn()
-        _seed_graph(conn)
+    def test_empty_filter_modes(self, graph_conn):
+        conn = graph_conn
 
         result = compute_visible_set(
             filter_modes={},
@@ -184,70 +262,36 @@ class TestAllFiltersOff:
 class TestSingleInclude:
     """Single include filter returns only matching nodes."""
 
-    def test_include_filter_1(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
+    @pytest.mark.parametrize("filter_id,expected", [
+        (1, {2, 4, 7}),  # Filter 1 matches: 2, 4, 7
+        (2, {3, 8, 9}),  # Filter 2 matches: 3, 8, 9
+    ])
+    def test_include_filter(self, conn, filter_id, expected):
         result = compute_visible_set(
-            filter_modes={1: "include"},
+            filter_modes={filter_id: "include"},
             hours=24,
             conn=conn,
         )
 
-        # Filter 1 matches: 2, 4, 7
-        assert set(result["visible_message_ids"]) == {2, 4, 7}
+        assert set(result["visible_message_ids"]) == expected
         assert result["visible_count"] == 3
         assert result["total_nodes"] == 10
 
-    def test_include_filter_2(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
-        result = compute_visible_set(
-            filter_modes={2: "include"},
-            hours=24,
-            conn=conn,
-        )
-
-        # Filter 2 matches: 3, 8, 9
-        assert set(result["visible_message_ids"]) == {3, 8, 9}
-        assert result["visible_count"] == 3
-
 
 class TestSingleExclude:
     """Single exclude filter removes matching nodes, keeps everything else."""
 
-    def test_exclude_filter_1(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
-        result = compute_visible_set(
-            filter_modes={1: "exclude"},
-            hours=24,
-            conn=conn,
-        )
-
-        # Exclude filter 1 matches (2, 4, 7) from all (1-10)
-        expected = {1, 3, 5, 6, 8, 9, 10}
-        assert set(result["visible_message_ids"]) == expected
-        assert result["visible_count"] == 7
-
-    def test_exclude_filter_2(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
+    @pytest.mark.parametrize("filter_id,expected", [
+        (1, {1, 3, 5, 6, 8, 9, 10}),  # Exclude filter 1 matches (2, 4, 7) from all (1-10)
+        (2, {1, 2, 4, 5, 6, 7, 10}),  # Exclude filter 2 matches (3, 8, 9)
+    ])
+    def test_exclude_filter(self, conn, filter_id, expected):
         result = compute_visible_set(
-            filter_modes={2: "exclude"},
+            filter_modes={filter_id: "exclude"},
             hours=24,
             conn=conn,
         )
 
-        # Exclude filter 2 matches (3, 8, 9)
-        expected = {1, 2, 4, 5, 6, 7, 10}
         assert set(result["visible_message_ids"]) == expected
         assert result["visible_count"] == 7
 
@@ -255,11 +299,7 @@ class TestSingleExclude:
 class TestIncludePlusExclude:
     """Include + Exclude combination: include narrows, exclude removes from that."""
 
-    def test_include_1_exclude_2(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
+    def test_include_1_exclude_2(self, conn):
         result = compute_visible_set(
             filter_modes={1: "include", 2: "exclude"},
             hours=24,
@@ -271,11 +311,7 @@ class TestIncludePlusExclude:
         # Result: {2, 4, 7} - {3, 8, 9} = {2, 4, 7}
         assert set(result["visible_message_ids"]) == {2, 4, 7}
 
-    def test_include_2_exclude_1(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
+    def test_include_2_exclude_1(self, conn):
         result = compute_visible_set(
             filter_modes={2: "include", 1: "exclude"},
             hours=24,
@@ -287,30 +323,12 @@ class TestIncludePlusExclude:
         # Result: {3, 8, 9} - {2, 4, 7} = {3, 8, 9}
         assert set(result["visible_message_ids"]) == {3, 8, 9}
 
-    def test_overlapping_include_exclude(self):
+    def test_overlapping_include_exclude(self, graph_conn):
         """When include and exclude match the same node, exclude wins."""
-        conn = _make_conn()
-        _seed_graph(conn)
+        conn = graph_conn
 
-        # Create a filter that matches msg 2 and 3
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (10, 'f10', 'q')"
-        )
-        # Create a filter that matches msg 2 and 5
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (11, 'f11', 'q')"
-        )
-        for mid in [2, 3]:
-            conn.execute(
-                "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (10, ?, 1)",
-                (mid,),
-            )
-        for mid in [2, 5]:
-            conn.execute(
-                "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (11, ?, 1)",
-                (mid,),
-            )
-        conn.commit()
+        # f10 matches msg 2 and 3, f11 matches msg 2 and 5
+        _add_filters(conn, {10: [2, 3], 11: [2, 5]})
 
         result = compute_visible_set(
             filter_modes={10: "include", 11: "exclude"},
@@ -326,151 +344,53 @@ class TestIncludePlusExclude:
 class TestIncludePlus1:
     """Include+1 expands one hop along structural edges."""
 
-    def test_expand_from_message_3(self):
-        """Message 3 in session A: neighbors are 2 and 4."""
-        conn = _make_conn()
-        _seed_graph(conn)
+    @pytest.mark.parametrize("seed,expected", [
+        (3, {2, 3, 4}),  # Message 3 in session A: neighbors are 2 and 4
+        (1, {1, 2}),     # Message 1 in session A: only neighbor is 2
+        (5, {4, 5}),     # No edge to 6: expansion does not cross sessions
+    ], ids=["middle", "edge_node", "no_cross_session"])
+    def test_expand_one_hop(self, seed, expected):
+        assert _bfs_expand({seed}, 1, LINEAR_ADJ) == expected
 
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (20, 'f20', 'q')"
-        )
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (20, 3, 1)"
-        )
-        conn.commit()
+    def test_end_to_end(self, graph_conn):
+        _add_filter(graph_conn, 20, [5])
 
         result = compute_visible_set(
             filter_modes={20: "include_plus_1"},
             hours=24,
-            conn=conn,
+            conn=graph_conn,
         )
 
-        # Seed: {3}, +1 hop: {2, 4}
-        assert set(result["visible_message_ids"]) == {2, 3, 4}
-
-    def test_expand_from_edge_node(self):
-        """Message 1 in session A: only neighbor is 2."""
-        conn = _make_conn()
-        _seed_graph(conn)
-
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (21, 'f21', 'q')"
-        )
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (21, 1, 1)"
-        )
-        conn.commit()
-
-        result = compute_visible_set(
-            filter_modes={21: "include_plus_1"},
-            hours=24,
-            conn=conn,
-        )
-
-        # Seed: {1}, +1 hop: {2}
-        assert set(result["visible_message_ids"]) == {1, 2}
-
-    def test_no_cross_session_expansion(self):
-        """Expansion does not cross session boundaries (5 and 6 are in different sessions)."""
-        conn = _make_conn()
-        _seed_graph(conn)
-
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (22, 'f22', 'q')"
-        )
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (22, 5, 1)"
-        )
-        conn.commit()
-
-        result = compute_visible_set(
-            filter_modes={22: "include_plus_1"},
-            hours=24,
-            conn=conn,
-        )
-
-        # Seed: {5}, +1 hop: {4} (no edge to 6, different session)
         assert set(result["visible_message_ids"]) == {4, 5}
 
 
 class TestIncludePlus2:
     """Include+2 expands two hops along structural edges."""
 
-    def test_expand_from_message_3(self):
-        """Message 3: +2 hops reaches 1,2,3,4,5."""
-        conn = _make_conn()
-        _seed_graph(conn)
+    @pytest.mark.parametrize("seed,expected", [
+        (3, {1, 2, 3, 4, 5}),    # Seed: {3}, +1: {2,4}, +2: {1,5}
+        (8, {6, 7, 8, 9, 10}),   # Seed: {8}, +1: {7,9}, +2: {6,10}
+        (1, {1, 2, 3}),          # Seed: {1}, +1: {2}, +2: {3}
+    ], ids=["message_3", "message_8", "edge_node"])
+    def test_expand_two_hops(self, seed, expected):
+        assert _bfs_expand({seed}, 2, LINEAR_ADJ) == expected
 
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (30, 'f30', 'q')"
-        )
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (30, 3, 1)"
-        )
-        conn.commit()
+    def test_end_to_end(self, graph_conn):
+        _add_filter(graph_conn, 30, [3])
 
         result = compute_visible_set(
             filter_modes={30: "include_plus_2"},
             hours=24,
-            conn=conn,
+            conn=graph_conn,
         )
 
-        # Seed: {3}, +1: {2,4}, +2: {1,5}
         assert set(result["visible_message_ids"]) == {1, 2, 3, 4, 5}
 
-    def test_expand_from_message_8(self):
-        """Message 8 in session B: +2 hops reaches 6,7,8,9,10."""
-        conn = _make_conn()
-        _seed_graph(conn)
-
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (31, 'f31', 'q')"
-        )
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (31, 8, 1)"
-        )
-        conn.commit()
-
-        result = compute_visible_set(
-            filter_modes={31: "include_plus_2"},
-            hours=24,
-            conn=conn,
-        )
-
-        # Seed: {8}, +1: {7,9}, +2: {6,10}
-        assert set(result["visible_message_ids"]) == {6, 7, 8, 9, 10}
-
-    def test_expand_from_edge_node(self):
-        """Message 1: +2 hops reaches 1,2,3."""
-        conn = _make_conn()
-        _seed_graph(conn)
-
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (32, 'f32', 'q')"
-        )
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (32, 1, 1)"
-        )
-        conn.commit()
-
-        result = compute_visible_set(
-            filter_modes={32: "include_plus_2"},
-            hours=24,
-            conn=conn,
-        )
-
-        # Seed: {1}, +1: {2}, +2: {3}
-        assert set(result["visible_message_ids"]) == {1, 2, 3}
-
 
 class TestMultipleIncludes:
     """Multiple includes use OR/union semantics."""
 
-    def test_two_includes_union(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
-
+    def test_two_includes_union(self, conn):
         result = compute_visible_set(
             filter_modes={1: "include", 2: "include"},
             hours=24,
@@ -482,11 +402,8 @@ class TestMultipleIncludes:
         assert set(result["visible_message_ids"]) == {2, 3, 4, 7, 8, 9}
         assert result["visible_count"] == 6
 
-    def test_include_plus_include_plus_1(self):
+    def test_include_plus_include_plus_1(self, conn):
         """One filter as include, another as include_plus_1 — both contribute to union."""
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
 
         result = compute_visible_set(
             filter_modes={1: "include", 2: "include_plus_1"},
@@ -503,15 +420,11 @@ class TestMultipleIncludes:
 class TestEmptyFilterResults:
     """Filter exists but has no matches."""
 
-    def test_include_with_no_matches(self):
-        conn = _make_conn()
-        _seed_graph(conn)
+    def test_include_with_no_matches(self, graph_conn):
+        conn = graph_conn
 
         # Create filter with zero matches
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (40, 'empty', 'q')"
-        )
-        conn.commit()
+        _add_filter(conn, 40, [])
 
         result = compute_visible_set(
             filter_modes={40: "include"},
@@ -523,14 +436,10 @@ class TestEmptyFilterResults:
         assert result["visible_message_ids"] == []
         assert result["visible_count"] == 0
 
-    def test_exclude_with_no_matches(self):
-        conn = _make_conn()
-        _seed_graph(conn)
+    def test_exclude_with_no_matches(self, graph_conn):
+        conn = graph_conn
 
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (41, 'empty2', 'q')"
-        )
-        conn.commit()
+        _add_filter(conn, 41, [])
 
         result = compute_visible_set(
             filter_modes={41: "exclude"},
@@ -539,25 +448,18 @@ class TestEmptyFilterResults:
         )
 
         # Exclude with no matches -> everything visible
-        assert set(result["visible_message_ids"]) == set(range(1, 11))
+        assert set(result["visible_message_ids"]) == ALL_IDS
         assert result["visible_count"] == 10
 
 
 class TestAllNodesFilteredOut:
     """When includes are active but nothing matches visible data."""
 
-    def test_all_filtered_out(self):
-        conn = _make_conn()
-        _seed_graph(conn)
+    def test_all_filtered_out(self, graph_conn):
+        conn = graph_conn
 
         # Create filter that only matches non-existent messages
-        conn.execute(
-            "INSERT INTO semantic_filters (id, name, query_text) VALUES (50, 'ghost', 'q')"
-        )
-        conn.execute(
-            "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (50, 999, 1)"
-        )
-        conn.commit()
+        _add_filter(conn, 50, [999])
 
         result = compute_visible_set(
             filter_modes={50: "include"},
@@ -569,27 +471,12 @@ class TestAllNodesFilteredOut:
         assert result["visible_message_ids"] == []
         assert result["visible_count"] == 0
 
-    def test_include_then_exclude_everything(self):
+    def test_include_then_exclude_everything(self, graph_conn):
         """Include a few, then exclude all of them."""
-        conn = _make_conn()
-        _seed_graph(conn)
+        conn = graph_conn
 
-        conn.execute("INSERT INTO semantic_filters (id, name, query_text) VALUES (51, 'f51', 'q')")
-        conn.execute("INSERT INTO semantic_filters (id, name, query_text) VALUES (52, 'f52', 'q')")
-
-        # f51 matches msg 2, 3
-        for mid in [2, 3]:
-            conn.execute(
-                "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (51, ?, 1)",
-                (mid,),
-            )
-        # f52 also matches msg 2, 3
-        for mid in [2, 3]:
-            conn.execute(
-                "INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (52, ?, 1)",
-                (mid,),
-            )
-        conn.commit()
+        # f51 and f52 both match msg 2, 3
+        _add_filters(conn, {51: [2, 3], 52: [2, 3]})
 
         result = compute_visible_set(
             filter_modes={51: "include", 52: "exclude"},
@@ -605,31 +492,19 @@ class TestAllNodesFilteredOut:
 class TestTimeRangeScoping:
     """Messages outside the time range are not included."""
 
-    def test_old_messages_excluded(self):
-        conn = _make_conn()
-        _create_schema(conn)
+    def test_old_messages_excluded(self, graph_conn):
+        conn = graph_conn
 
-        recent = _hours_ago(1)
+        # An old session whose only message is outside the 24h window
         old = _hours_ago(100)
-
-        conn.execute("INSERT INTO sessions VALUES ('s1', '/proj', ?)", (old,))
-
-        # Recent message
-        conn.execute(
-            "INSERT INTO messages (id, session_id, role, content, sequence_num, timestamp) VALUES (1, 's1', 'user', 'recent', 1, ?)",
-            (recent,),
-        )
-        # Old message
-        conn.execute(
-            "INSERT INTO messages (id, session_id, role, content, sequence_num, timestamp) VALUES (2, 's1', 'assistant', 'old', 2, ?)",
-            (old,),
-        )
-
-        conn.execute("INSERT INTO semantic_filters (id, name, query_text) VALUES (60, 'f60', 'q')")
-        # Both match the filter
-        conn.execute("INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (60, 1, 1)")
-        conn.execute("INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (60, 2, 1)")
-        conn.commit()
+        with conn:
+            conn.executemany("INSERT INTO sessions VALUES (?, ?, ?)", [("sess-old", "/proj/old", old)])
+            conn.executemany(
+                "INSERT INTO messages (id, session_id, role, content, sequence_num, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                [(11, "sess-old", "user", "old", 1, old)],
+            )
+        # Matches one recent message and the old one
+        _add_filter(conn, 60, [1, 11])
 
         result = compute_visible_set(
             filter_modes={60: "include"},
@@ -637,11 +512,20 @@ class TestTimeRangeScoping:
             conn=conn,
         )
 
-        # Only message 1 is within 24h
-        assert result["total_nodes"] == 1
+        # Only the seeded messages are within 24h, so message 11 is dropped
+        assert result["total_nodes"] == 10
         assert set(result["visible_message_ids"]) == {1}
 
 
+class TestBuildAdjacencyList:
+    """_build_adjacency_list links consecutive messages within a session."""
+
+    def test_seed_graph_is_linear_adj(self, graph_conn):
+        # The pure _bfs_expand tests above rely on this equivalence
+        adj = _build_adjacency_list(graph_conn.cursor(), set(), hours=24)
+        assert adj == LINEAR_ADJ
+
+
 class TestBFSExpand:
     """Unit tests for _bfs_expand."""
 
@@ -670,18 +554,11 @@ class TestBFSExpand:
 class TestExpandWithExclude:
     """Include+N expansion followed by exclude."""
 
-    def test_plus1_then_exclude(self):
-        conn = _make_conn()
-        _seed_graph(conn)
-
-        conn.execute("INSERT INTO semantic_filters (id, name, query_text) VALUES (70, 'f70', 'q')")
-        conn.execute("INSERT INTO semantic_filters (id, name, query_text) VALUES (71, 'f71', 'q')")
+    def test_plus1_then_exclude(self, graph_conn):
+        conn = graph_conn
 
-        # f70 matches msg 3 (include_plus_1 -> {2,3,4})
-        conn.execute("INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (70, 3, 1)")
-        # f71 matches msg 2 (exclude)
-        conn.execute("INSERT INTO semantic_filter_results (filter_id, message_id, matches) VALUES (71, 2, 1)")
-        conn.commit()
+        # f70 matches msg 3 (include_plus_1 -> {2,3,4}), f71 matches msg 2 (exclude)
+        _add_filters(conn, {70: [3], 71: [2]})
 
         result = compute_visible_set(
             filter_modes={70: "include_plus_1", 71: "exclude"},
@@ -696,11 +573,8 @@ class TestExpandWithExclude:
 class TestMixedModes:
     """Complex combinations of filter modes."""
 
-    def test_include_plus2_and_include_and_exclude(self):
+    def test_include_plus2_and_include_and_exclude(self, conn):
         """Two includes (one with expansion) + one exclude."""
-        conn = _make_conn()
-        _seed_graph(conn)
-        _seed_filters(conn)
 
         result = compute_visible_set(
             filter_modes={1: "include_plus_2", 2: "exclude"},
@@ -12,16 +12,30 @@ Usage:
     python ingest.py --path /other/.claude/   # Custom Claude dir
     python ingest.py --db /path/to/db.sqlite  # Custom database path
     python ingest.py --stats-only             # Only import stats-cache.json
+    python ingest.py --workers 1              # Parse transcripts without a process pool
+    python ingest.py --force                  # Re-parse transcripts that have not changed
 """
 
 import argparse
+import itertools
 import json
 import os
 import re
 import sqlite3
 import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
+from typing import TextIO
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional: ingest.py also runs with only the stdlib
+    _loads = json.loads
 
 
 DEFAULT_CLAUDE_DIR = Path.home() / ".claude"
@@ -35,7 +49,13 @@ SCHEMA_FILE = Path(__file__).parent / "schema.sqlite.sql"
 
 AGENT_PATH_KEYWORDS = {"polecats", "crew", "witness", "refinery", "mayor"}
 
+_SINCE_RE = re.compile(r"^(\d+)([dhm])$")
+
+# Sessions per write transaction during import
+_COMMIT_EVERY = 500
+
 
+@lru_cache(maxsize=4096)
 def detect_agent_type(project_path: str) -> str | None:
     """Detect if a session path indicates an agent session.
 
@@ -54,7 +74,7 @@ def detect_agent_type(project_path: str) -> str | None:
 
 def parse_since(since_str: str) -> datetime:
     """Parse a --since string like '7d', '24h', '30d' into a cutoff datetime."""
-    match = re.match(r"^(\d+)([dhm])$", since_str)
+    match = _SINCE_RE.match(since_str)
     if not match:
         raise ValueError(f"Invalid --since format: {since_str!r}. Use e.g. '7d', '24h', '30m'")
     value, unit = int(match.group(1)), match.group(2)
@@ -65,10 +85,15 @@ def parse_since(since_str: str) -> datetime:
 def init_db(db_path: Path) -> sqlite3.Connection:
     """Create database and apply schema if needed."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(db_path))
+    # Autocommit mode: ingest issues its own BEGIN/COMMIT/SAVEPOINT statements
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
     conn.execute("PRAGMA journal_mode = WAL")
     conn.execute("PRAGMA busy_timeout = 30000")
     conn.execute("PRAGMA foreign_keys = ON")
+    # WAL makes NORMAL crash-safe; only the last commits can be lost on power failure
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -65536")  # 64MB
 
     if SCHEMA_FILE.exists():
         schema = SCHEMA_FILE.read_text()
@@ -80,6 +105,38 @@ def init_db(db_path: Path) -> sqlite3.Connection:
     return conn
 
 
+def _fold(name: str) -> str:
+    """Case- and normalization-insensitive form of a file name."""
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def _path_exists(parent: str, name: str, listings: dict) -> bool:
+    """Path(parent/name).exists(), answered from one cached scandir of parent.
+
+    The greedy directory-name decoder probes many hyphen-joined names under
+    the same parent; listing it once replaces a stat() per candidate.
+    A name that is not listed exactly but matches an entry ignoring case
+    and Unicode normalization is checked with a real stat, since the
+    filesystem may treat them as equal (APFS and HFS+ do by default).
+    """
+    if parent not in listings:
+        try:
+            with os.scandir(parent) as it:
+                names = {e.name: e.is_symlink() for e in it}
+            listings[parent] = (names, {_fold(n) for n in names})
+        except OSError:
+            listings[parent] = None
+    listing = listings[parent]
+    path = parent.rstrip("/") + "/" + name
+    if listing is None or name in ("", ".", ".."):
+        return os.path.exists(path)
+    names, folded = listing
+    if name not in names:
+        return _fold(name) in folded and os.path.exists(path)
+    # Broken symlinks are listed but do not exist
+    return not names[name] or os.path.exists(path)
+
+
 def discover_sessions(claude_dir: Path, since: datetime | None = None) -> list[dict]:
     """Find all sessions from sessions-index.json files and unindexed JSONL files."""
     projects_dir = claude_dir / "projects"
@@ -89,6 +146,7 @@ def discover_sessions(claude_dir: Path, since: datetime | None = None) -> list[d
 
     sessions = []
     indexed_ids: set[str] = set()
+    listings: dict[str, tuple[dict[str, bool], set[str]] | None] = {}
 
     for project_dir in projects_dir.iterdir():
         if not project_dir.is_dir():
@@ -119,9 +177,9 @@ def discover_sessions(claude_dir: Path, since: datetime | None = None) -> list[d
             while i < len(parts):
                 # Try joining progressively more segments with hyphens
                 for j in range(len(parts), i, -1):
-                    candidate = built.rstrip("/") + "/" + "-".join(parts[i:j])
-                    if Path(candidate).exists():
-                        built = candidate
+                    name = "-".join(parts[i:j])
+                    if _path_exists(built.rstrip("/") or "/", name, listings):
+                        built = built.rstrip("/") + "/" + name
                         i = j
                         break
                 else:
@@ -174,25 +232,29 @@ def discover_sessions(claude_dir: Path, since: datetime | None = None) -> list[d
 
         # Phase 2: Discover JSONL files not present in the index
         since_ts = since.timestamp() if since else None
-        for jsonl_path in project_dir.glob("*.jsonl"):
-            session_id = jsonl_path.stem
-            if session_id in indexed_ids:
-                continue
-
-            # Apply --since filter using file mtime
-            if since_ts and jsonl_path.stat().st_mtime < since_ts:
-                continue
-
-            # Build a synthetic index entry from the JSONL file
-            mtime = datetime.fromtimestamp(jsonl_path.stat().st_mtime, tz=timezone.utc)
-            sessions.append({
-                "sessionId": session_id,
-                "created": mtime.isoformat(),
-                "modified": mtime.isoformat(),
-                "_project_path": original_path,
-                "_project_dir": str(project_dir),
-                "fullPath": str(jsonl_path),
-            })
+        with os.scandir(project_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".jsonl"):
+                    continue
+                session_id = os.path.splitext(entry.name)[0]
+                if session_id in indexed_ids:
+                    continue
+
+                # Apply --since filter using file mtime (DirEntry caches the stat)
+                st_mtime = entry.stat().st_mtime
+                if since_ts and st_mtime < since_ts:
+                    continue
+
+                # Build a synthetic index entry from the JSONL file
+                mtime = datetime.fromtimestamp(st_mtime, tz=timezone.utc)
+                sessions.append({
+                    "sessionId": session_id,
+                    "created": mtime.isoformat(),
+                    "modified": mtime.isoformat(),
+                    "_project_path": original_path,
+                    "_project_dir": str(project_dir),
+                    "fullPath": entry.path,
+                })
 
     return sessions
 
@@ -219,14 +281,14 @@ def parse_transcript(jsonl_path: Path, agent_type: str | None = None) -> dict:
     if not jsonl_path.exists():
         return {"messages": [], "tool_usages": []}
 
-    with open(jsonl_path) as f:
+    # Read bytes: both parsers accept UTF-8 bytes, which skips decoding each
+    # line to str. They also ignore surrounding whitespace, so lines are not
+    # stripped; blank lines fail to parse and are skipped like malformed ones.
+    with open(jsonl_path, "rb", buffering=1 << 20) as f:
         for line in f:
-            line = line.strip()
-            if not line:
-                continue
             try:
-                entry = json.loads(line)
-            except json.JSONDecodeError:
+                entry = _loads(line)
+            except ValueError:  # JSONDecodeError, or invalid UTF-8
                 continue
 
             entry_type = entry.get("type", "")
@@ -297,9 +359,50 @@ def parse_transcript(jsonl_path: Path, agent_type: str | None = None) -> dict:
     return {"messages": messages, "tool_usages": tool_usages}
 
 
-def import_session(conn: sqlite3.Connection, session_info: dict, claude_dir: Path) -> dict:
+def _transcript_path(session_info: dict) -> Path:
+    """Find the JSONL transcript file for a discovered session."""
+    full_path = session_info.get("fullPath", "")
+    if full_path:
+        return Path(full_path)
+    project_dir = session_info.get("_project_dir", "")
+    return Path(project_dir) / f"{session_info.get('sessionId', '')}.jsonl"
+
+
+def _fingerprint(session_info: dict) -> tuple[int, int] | None:
+    """(mtime_ns, size) of a session's transcript, or None if it can't be stat'ed."""
+    try:
+        st = _transcript_path(session_info).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _parse_task(session_info: dict) -> dict | Exception:
+    """Process-pool entry point: parse one session's transcript.
+
+    Errors are returned rather than raised so one bad file does not abort
+    the executor.map iteration; run_ingest re-raises them per session.
+    """
+    try:
+        return parse_transcript(
+            _transcript_path(session_info),
+            agent_type=detect_agent_type(session_info.get("_project_path", "")),
+        )
+    except Exception as e:
+        return e
+
+
+def import_session(
+    conn: sqlite3.Connection,
+    session_info: dict,
+    claude_dir: Path,
+    transcript: dict | None = None,
+) -> dict:
     """Import a single session into the database.
 
+    transcript is parse_transcript's result when the caller parsed it
+    already (e.g. in a worker process); otherwise it is parsed here.
+
     Returns stats dict: {"messages": N, "tools": N, "skipped": bool}
     """
     session_id = session_info.get("sessionId", "")
@@ -311,13 +414,7 @@ def import_session(conn: sqlite3.Connection, session_info: dict, claude_dir: Pat
     modified = session_info.get("modified", "")
     git_branch = session_info.get("gitBranch", "")
 
-    # Find transcript file
-    full_path = session_info.get("fullPath", "")
-    if full_path:
-        jsonl_path = Path(full_path)
-    else:
-        project_dir = session_info.get("_project_dir", "")
-        jsonl_path = Path(project_dir) / f"{session_id}.jsonl"
+    jsonl_path = _transcript_path(session_info)
 
     # Insert session
     conn.execute(
@@ -341,29 +438,23 @@ def import_session(conn: sqlite3.Connection, session_info: dict, claude_dir: Pat
     agent_type = detect_agent_type(project_path)
 
     # Parse transcript
-    transcript = parse_transcript(jsonl_path, agent_type=agent_type)
+    if transcript is None:
+        transcript = parse_transcript(jsonl_path, agent_type=agent_type)
     messages = transcript["messages"]
     tool_usages = transcript["tool_usages"]
 
-    msg_count = 0
-    tool_count = 0
-
-    # Build a map from message sequence_num to database message id
-    msg_id_map = {}
-
-    for msg in messages:
-        cursor = conn.execute(
-            """INSERT INTO messages
-                   (session_id, role, content, sequence_num, timestamp,
-                    model, input_tokens, output_tokens, cache_read_tokens, cache_creation_tokens)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-               ON CONFLICT (session_id, sequence_num) DO UPDATE SET
-                   role = excluded.role,
-                   content = excluded.content,
-                   model = COALESCE(excluded.model, messages.model),
-                   input_tokens = COALESCE(excluded.input_tokens, messages.input_tokens),
-                   output_tokens = COALESCE(excluded.output_tokens, messages.output_tokens)
-               RETURNING id""",
+    conn.executemany(
+        """INSERT INTO messages
+               (session_id, role, content, sequence_num, timestamp,
+                model, input_tokens, output_tokens, cache_read_tokens, cache_creation_tokens)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT (session_id, sequence_num) DO UPDATE SET
+               role = excluded.role,
+               content = excluded.content,
+               model = COALESCE(excluded.model, messages.model),
+               input_tokens = COALESCE(excluded.input_tokens, messages.input_tokens),
+               output_tokens = COALESCE(excluded.output_tokens, messages.output_tokens)""",
+        [
             (
                 session_id,
                 msg["role"],
@@ -375,31 +466,41 @@ def import_session(conn: sqlite3.Connection, session_info: dict, claude_dir: Pat
                 msg["output_tokens"],
                 msg["cache_read_tokens"],
                 msg["cache_creation_tokens"],
-            ),
-        )
-        row = cursor.fetchone()
-        if row:
-            msg_id_map[msg["sequence_num"]] = row[0]
-            msg_count += 1
+            )
+            for msg in messages
+        ],
+    )
+    msg_count = len(messages)
+
+    # Build a map from message sequence_num to database message id;
+    # (session_id, sequence_num) is unique, so one SELECT covers them all
+    msg_id_map = {}
+    if tool_usages:
+        msg_id_map = dict(conn.execute(
+            "SELECT sequence_num, id FROM messages WHERE session_id = ?",
+            (session_id,),
+        ))
 
     # Insert tool usages
+    tool_rows = []
     for i, tool in enumerate(tool_usages):
         message_id = msg_id_map.get(tool["message_index"])
         if not message_id:
             continue
+        tool_rows.append((message_id, tool["tool_name"], tool["tool_input"], i))
 
-        conn.execute(
-            """INSERT INTO tool_usages (message_id, tool_name, tool_input, sequence_num)
-               VALUES (?, ?, ?, ?)
-               ON CONFLICT DO NOTHING""",
-            (message_id, tool["tool_name"], tool["tool_input"], i),
-        )
-        tool_count += 1
+    conn.executemany(
+        """INSERT INTO tool_usages (message_id, tool_name, tool_input, sequence_num)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT DO NOTHING""",
+        tool_rows,
+    )
+    tool_count = len(tool_rows)
 
     return {"messages": msg_count, "tools": tool_count, "skipped": False}
 
 
-def import_stats(conn: sqlite3.Connection, claude_dir: Path):
+def import_stats(conn: sqlite3.Connection, claude_dir: Path, out: TextIO | None = None):
     """Import stats-cache.json into daily_usage, model_usage, and overall_stats."""
     stats_path = claude_dir / "stats-cache.json"
     if not stats_path.exists():
@@ -413,50 +514,52 @@ def import_stats(conn: sqlite3.Connection, claude_dir: Path):
         print(f"Error reading stats-cache.json: {e}", file=sys.stderr)
         return
 
+    conn.execute("BEGIN")
+
     # Daily usage from dailyModelTokens
     daily_tokens = data.get("dailyModelTokens", [])
-    daily_activity = {d["date"]: d for d in data.get("dailyActivity", [])}
+    # (messageCount, sessionCount, toolCallCount) per date, shared by every model that day
+    daily_activity = {
+        d["date"]: (d.get("messageCount", 0), d.get("sessionCount", 0), d.get("toolCallCount", 0))
+        for d in data.get("dailyActivity", [])
+    }
 
+    daily_rows = []
     for day in daily_tokens:
         date = day.get("date", "")
         tokens_by_model = day.get("tokensByModel", {})
-        activity = daily_activity.get(date, {})
+        activity = daily_activity.get(date, (0, 0, 0))
 
         for model, total_tokens in tokens_by_model.items():
-            conn.execute(
-                """INSERT INTO daily_usage (date, model, output_tokens, message_count, session_count, tool_call_count)
-                   VALUES (?, ?, ?, ?, ?, ?)
-                   ON CONFLICT (date, model) DO UPDATE SET
-                       output_tokens = excluded.output_tokens,
-                       message_count = excluded.message_count,
-                       session_count = excluded.session_count,
-                       tool_call_count = excluded.tool_call_count,
-                       synced_at = datetime('now')""",
-                (
-                    date,
-                    model,
-                    total_tokens,
-                    activity.get("messageCount", 0),
-                    activity.get("sessionCount", 0),
-                    activity.get("toolCallCount", 0),
-                ),
-            )
+            daily_rows.append((date, model, total_tokens, *activity))
+
+    conn.executemany(
+        """INSERT INTO daily_usage (date, model, output_tokens, message_count, session_count, tool_call_count)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT (date, model) DO UPDATE SET
+               output_tokens = excluded.output_tokens,
+               message_count = excluded.message_count,
+               session_count = excluded.session_count,
+               tool_call_count = excluded.tool_call_count,
+               synced_at = datetime('now')""",
+        daily_rows,
+    )
 
     # Model usage
     model_usage = data.get("modelUsage", {})
-    for model, usage in model_usage.items():
-        conn.execute(
-            """INSERT INTO model_usage
-                   (model, input_tokens, output_tokens, cache_read_tokens,
-                    cache_creation_tokens, web_search_requests)
-               VALUES (?, ?, ?, ?, ?, ?)
-               ON CONFLICT (model) DO UPDATE SET
-                   input_tokens = excluded.input_tokens,
-                   output_tokens = excluded.output_tokens,
-                   cache_read_tokens = excluded.cache_read_tokens,
-                   cache_creation_tokens = excluded.cache_creation_tokens,
-                   web_search_requests = excluded.web_search_requests,
-                   synced_at = datetime('now')""",
+    conn.executemany(
+        """INSERT INTO model_usage
+               (model, input_tokens, output_tokens, cache_read_tokens,
+                cache_creation_tokens, web_search_requests)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT (model) DO UPDATE SET
+               input_tokens = excluded.input_tokens,
+               output_tokens = excluded.output_tokens,
+               cache_read_tokens = excluded.cache_read_tokens,
+               cache_creation_tokens = excluded.cache_creation_tokens,
+               web_search_requests = excluded.web_search_requests,
+               synced_at = datetime('now')""",
+        [
             (
                 model,
                 usage.get("inputTokens", 0),
@@ -464,8 +567,10 @@ def import_stats(conn: sqlite3.Connection, claude_dir: Path):
                 usage.get("cacheReadInputTokens", 0),
                 usage.get("cacheCreationInputTokens", 0),
                 usage.get("webSearchRequests", 0),
-            ),
-        )
+            )
+            for model, usage in model_usage.items()
+        ],
+    )
 
     # Overall stats
     hour_counts = data.get("hourCounts", {})
@@ -492,8 +597,8 @@ def import_stats(conn: sqlite3.Connection, claude_dir: Path):
         ),
     )
 
-    conn.commit()
-    print(f"Stats imported: {len(model_usage)} models, {len(daily_tokens)} daily entries")
+    conn.execute("COMMIT")
+    print(f"Stats imported: {len(model_usage)} models, {len(daily_tokens)} daily entries", file=out)
 
 
 def main():
@@ -523,6 +628,17 @@ def main():
         action="store_true",
         help="Only import stats-cache.json, skip session transcripts",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to parse transcripts (default: CPU count; 1 parses inline)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-import every session, even if its transcript is unchanged since the last run",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -547,10 +663,7 @@ def main():
     if args.dry_run:
         sessions = discover_sessions(claude_dir, since)
         if not sessions:
-            print("No Claude Code sessions found.")
-            print()
-            print("To generate history, use Claude Code: https://claude.ai/claude-code")
-            print(f"Or specify a custom path: python3 ingest.py --path /path/to/.claude/")
+            _print_no_sessions()
             return
         print(f"Would import {len(sessions)} sessions")
         for s in sessions[:10]:
@@ -559,65 +672,193 @@ def main():
             print(f"  ... and {len(sessions) - 10} more")
         return
 
-    conn = init_db(args.db)
+    run_ingest(
+        claude_dir, args.db, since,
+        stats_only=args.stats_only, workers=args.workers, force=args.force,
+    )
+
+
+def _print_no_sessions(out: TextIO | None = None):
+    print("No Claude Code sessions found.", file=out)
+    print(file=out)
+    print("To generate history, use Claude Code: https://claude.ai/claude-code", file=out)
+    print(f"Or specify a custom path: python3 ingest.py --path /path/to/.claude/", file=out)
+
+
+def run_ingest(
+    claude_dir: Path,
+    db_path: Path,
+    since: datetime | None = None,
+    stats_only: bool = False,
+    workers: int = 1,
+    force: bool = False,
+    out: TextIO | None = None,
+    timeout: float | None = None,
+) -> dict:
+    """Import stats and session transcripts into the database.
+
+    Used by main() and by the API's /ingest endpoint, which calls it
+    in-process instead of spawning a new interpreter.
+
+    With workers > 1, transcripts are parsed in a process pool while this
+    process writes the results to SQLite in discovery order. The API keeps
+    the default of 1: it loads this file by path, so worker processes
+    could not import it.
+
+    Sessions whose transcript (mtime, size) matches ingest_meta from an
+    earlier run are skipped unless force is set.
+
+    Progress goes to `out` (stdout by default). Per-session errors go to
+    stderr, and to `out` as well when one is given.
+    With a timeout (seconds), no new session is started once it has passed:
+    the sessions imported so far are committed and `timed_out` is set.
+
+    Returns: {sessions, messages, tools, errors, unchanged, timed_out} counts for this run.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    counts = {"sessions": 0, "messages": 0, "tools": 0, "errors": 0, "unchanged": 0, "timed_out": False}
+    conn = init_db(db_path)
 
     # Import stats
-    import_stats(conn, claude_dir)
+    import_stats(conn, claude_dir, out)
 
-    if args.stats_only:
+    if stats_only:
         conn.close()
-        return
+        return counts
 
     # Discover and import sessions
     sessions = discover_sessions(claude_dir, since)
     if not sessions:
-        print("No Claude Code sessions found.")
-        print()
-        print("To generate history, use Claude Code: https://claude.ai/claude-code")
-        print(f"Or specify a custom path: python3 ingest.py --path /path/to/.claude/")
+        _print_no_sessions(out)
         conn.close()
-        return
-    print(f"Found {len(sessions)} sessions to import")
-    print()
+        return counts
+
+    # Skip transcripts that have not changed since they were last imported.
+    # Fingerprints are taken before parsing, so a file that grows mid-run
+    # is picked up again next time.
+    seen = {} if force else {
+        sid: (mtime_ns, size)
+        for sid, mtime_ns, size in conn.execute("SELECT session_id, mtime_ns, size FROM ingest_meta")
+    }
+    pending = []
+    for session in sessions:
+        fingerprint = _fingerprint(session)
+        if fingerprint is not None and seen.get(session.get("sessionId", "")) == fingerprint:
+            continue
+        session["_fingerprint"] = fingerprint
+        pending.append(session)
+    unchanged = len(sessions) - len(pending)
+    sessions = pending
+
+    print(f"Found {len(sessions)} sessions to import", file=out)
+    if unchanged:
+        print(f"  ({unchanged} unchanged since the last import, skipped; use --force to re-import)", file=out)
+    print(file=out)
 
     total_msgs = 0
     total_tools = 0
     imported = 0
     errors = 0
-
-    for i, session in enumerate(sessions):
-        session_id = session.get("sessionId", "unknown")
-        summary = session.get("summary", session.get("firstPrompt", ""))
-        label = (summary or "")[:50]
-
+    timed_out = False
+
+    # A dead worker (BrokenProcessPool) or Ctrl-C surfaces from the loop
+    # header, outside the per-session handler: keep the sessions already
+    # imported, drop a half-imported one, and always release the pool
+    # and the connection. The pool is shut down by hand rather than with
+    # `with`, whose exit would wait for every queued parse.
+    pool = None
+    try:
+        if workers > 1 and len(sessions) > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            transcripts = pool.map(_parse_task, sessions, chunksize=16)
+        else:
+            transcripts = itertools.repeat(None)
+
+        conn.execute("BEGIN")
+        for i, (session, transcript) in enumerate(zip(sessions, transcripts)):
+            session_id = session.get("sessionId", "unknown")
+            summary = session.get("summary", session.get("firstPrompt", ""))
+            label = (summary or "")[:50]
+
+            if deadline is not None and time.monotonic() > deadline:
+                timed_out = True
+                print(f"Timed out after {timeout:g}s; {len(sessions) - i} sessions left for the next run", file=out)
+                break
+
+            if i and i % _COMMIT_EVERY == 0:
+                conn.execute("COMMIT")
+                conn.execute("BEGIN")
+
+            # Each session is all-or-nothing: a failure part-way through
+            # rolls back its rows without touching the rest of the batch
+            conn.execute("SAVEPOINT import_session")
+            try:
+                if isinstance(transcript, Exception):
+                    raise transcript
+                result = import_session(conn, session, claude_dir, transcript)
+                if result["skipped"]:
+                    conn.execute("RELEASE import_session")
+                    continue
+                if session["_fingerprint"] is not None:
+                    conn.execute(
+                        """INSERT INTO ingest_meta (session_id, mtime_ns, size) VALUES (?, ?, ?)
+                           ON CONFLICT (session_id) DO UPDATE SET
+                               mtime_ns = excluded.mtime_ns,
+                               size = excluded.size""",
+                        (session_id, *session["_fingerprint"]),
+                    )
+                conn.execute("RELEASE import_session")
+
+                total_msgs += result["messages"]
+                total_tools += result["tools"]
+                imported += 1
+
+                print(
+                    f"  [{i+1}/{len(sessions)}] {session_id[:8]}... "
+                    f"({result['messages']} msgs, {result['tools']} tools) {label}",
+                    file=out,
+                )
+
+            except Exception as e:
+                conn.execute("ROLLBACK TO import_session")
+                conn.execute("RELEASE import_session")
+                errors += 1
+                line = f"  [{i+1}/{len(sessions)}] {session_id[:8]}... ERROR: {e}"
+                print(line, file=sys.stderr)
+                if out is not None:
+                    print(line, file=out)
+        conn.execute("COMMIT")
+    except BaseException:
+        # Best effort: a broken connection or disk/IO error here must not
+        # replace the exception being re-raised
         try:
-            result = import_session(conn, session, claude_dir)
-            if result["skipped"]:
-                continue
-
-            total_msgs += result["messages"]
-            total_tools += result["tools"]
-            imported += 1
-
-            if (i + 1) % 50 == 0 or i == len(sessions) - 1:
-                conn.commit()
-
-            print(
-                f"  [{i+1}/{len(sessions)}] {session_id[:8]}... "
-                f"({result['messages']} msgs, {result['tools']} tools) {label}"
-            )
-
-        except Exception as e:
-            errors += 1
-            print(f"  [{i+1}/{len(sessions)}] {session_id[:8]}... ERROR: {e}", file=sys.stderr)
-
-    conn.commit()
-    conn.close()
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK TO import_session")
+                except sqlite3.OperationalError:
+                    pass  # failed between sessions, no savepoint open
+                conn.execute("COMMIT")
+        except sqlite3.Error:
+            pass
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        conn.close()
 
-    print()
-    print(f"Done: {imported} sessions, {total_msgs} messages, {total_tools} tool usages")
+    print(file=out)
+    print(f"Done: {imported} sessions, {total_msgs} messages, {total_tools} tool usages", file=out)
     if errors:
-        print(f"  {errors} errors encountered")
+        print(f"  {errors} errors encountered", file=out)
+
+    return {
+        "sessions": imported,
+        "messages": total_msgs,
+        "tools": total_tools,
+        "errors": errors,
+        "unchanged": unchanged,
+        "timed_out": timed_out,
+    }
 
 
 if __name__ == "__main__":
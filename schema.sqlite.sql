@@ -99,6 +99,10 @@ CREATE TABLE IF NOT EXISTS tool_usages (
 
 CREATE INDEX IF NOT EXISTS idx_tool_usages_message ON tool_usages (message_id);
 CREATE INDEX IF NOT EXISTS idx_tool_usages_name    ON tool_usages (tool_name);
+-- Project detection filters on tool_name, joins on message_id and reads
+-- the file_path out of tool_input; newer SQLite can answer it from the index
+CREATE INDEX IF NOT EXISTS idx_tool_usages_name_path
+    ON tool_usages (tool_name, message_id, json_extract(tool_input, '$.file_path'));
 
 -- ============================================================
 -- SESSION SUMMARIES TABLE
@@ -120,6 +124,45 @@ CREATE TABLE IF NOT EXISTS session_summaries (
         ON DELETE CASCADE
 );
 
+-- ============================================================
+-- SESSION PROJECT COUNTS TABLE
+-- Materialized file-path project counts per session, maintained
+-- incrementally by project detection (see project_detection.py).
+-- ============================================================
+CREATE TABLE IF NOT EXISTS session_project_counts (
+    session_id TEXT    NOT NULL,
+    project    TEXT    NOT NULL,
+    cnt        INTEGER NOT NULL,
+
+    PRIMARY KEY (session_id, project),
+
+    FOREIGN KEY (session_id)
+        REFERENCES sessions (session_id)
+        ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Highest tool_usages.id already folded into session_project_counts (singleton row with id=1)
+CREATE TABLE IF NOT EXISTS project_detection_state (
+    id                INTEGER PRIMARY KEY,  -- always 1
+    max_tool_usage_id INTEGER NOT NULL DEFAULT 0,
+    updated_at        TEXT
+);
+
+-- ============================================================
+-- INGEST META TABLE
+-- Transcript file fingerprint at the last successful ingest.py import;
+-- unchanged transcripts are not re-parsed on the next run.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS ingest_meta (
+    session_id  TEXT PRIMARY KEY,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+
+    FOREIGN KEY (session_id)
+        REFERENCES sessions (session_id)
+        ON DELETE CASCADE
+);
+
 -- ============================================================
 -- SEMANTIC FILTERS TABLE
 -- User-defined natural-language filters for graph visualization.
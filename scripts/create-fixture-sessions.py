@@ -4,12 +4,16 @@
 Generates a minimal but realistic ~/.claude/ directory structure with
 sessions, messages, tool usages, and stats — enough to verify ingest.py
 works end-to-end.
+
+Pass --extra-sessions N to add N generated sessions (--messages each) for
+ingest load testing; the default output is just the two fixed sessions.
 """
 
+import argparse
 import json
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 CLAUDE_DIR = os.path.expanduser("~/.claude")
 PROJECT_DIR_NAME = "-Users-testuser-projects-myapp"
@@ -66,11 +70,49 @@ def create_session(session_id: str, start: datetime, messages: list[dict]) -> st
     return "\n".join(lines) + "\n"
 
 
+def synthetic_messages(n: int) -> list[dict]:
+    """Alternating user/assistant specs; every other assistant turn uses a tool."""
+    specs = []
+    for i in range(n):
+        if i % 2 == 0:
+            specs.append({"role": "user", "content": f"Synthetic question {i // 2}"})
+        else:
+            spec = {"role": "assistant", "content": f"Synthetic answer {i // 2}"}
+            if i % 4 == 3:
+                spec["tools"] = [{"name": "Read", "input": {"file_path": f"/app/module_{i}.py"}}]
+            specs.append(spec)
+    return specs
+
+
+def index_entry(project_dir: str, session_id: str, start: datetime,
+                first_prompt: str, summary: str, message_count: int) -> dict:
+    """Build a sessions-index.json entry for a session written to project_dir."""
+    return {
+        "sessionId": session_id,
+        "fullPath": os.path.join(project_dir, f"{session_id}.jsonl"),
+        "fileMtime": int(start.timestamp() * 1000),
+        "firstPrompt": first_prompt,
+        "summary": summary,
+        "messageCount": message_count,
+        "created": start.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "modified": (start + timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "projectPath": "/Users/testuser/projects/myapp",
+        "isSidechain": False,
+    }
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--extra-sessions", type=int, default=0,
+                        help="Also generate N synthetic sessions (default: 0)")
+    parser.add_argument("--messages", type=int, default=20,
+                        help="Messages per synthetic session (default: 20)")
+    args = parser.parse_args()
+
     project_dir = os.path.join(CLAUDE_DIR, "projects", PROJECT_DIR_NAME)
     os.makedirs(project_dir, exist_ok=True)
 
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
 
     # --- Session 1: simple Q&A ---
     s1_id = "aaaaaaaa-1111-1111-1111-aaaaaaaaaaaa"
@@ -104,8 +146,25 @@ def main():
         },
     ])
 
+    transcripts = [(s1_id, s1_jsonl), (s2_id, s2_jsonl)]
+    entries = [
+        index_entry(project_dir, s1_id, s1_start,
+                    "How do I create a Python virtual environment?", "Python venv setup help", 4),
+        index_entry(project_dir, s2_id, s2_start,
+                    "Add a health check endpoint to my Flask app", "Flask health check endpoint", 4),
+    ]
+
+    # --- Optional synthetic sessions, spread over the last day ---
+    specs = synthetic_messages(args.messages)
+    for k in range(args.extra_sessions):
+        sid = f"{k:08x}-0000-4000-8000-000000000000"
+        start = now - timedelta(hours=3, seconds=k * 86400 // max(args.extra_sessions, 1))
+        transcripts.append((sid, create_session(sid, start, specs)))
+        entries.append(index_entry(project_dir, sid, start,
+                                   "Synthetic question 0", f"Synthetic session {k}", len(specs)))
+
     # Write .jsonl files
-    for sid, content in [(s1_id, s1_jsonl), (s2_id, s2_jsonl)]:
+    for sid, content in transcripts:
         path = os.path.join(project_dir, f"{sid}.jsonl")
         with open(path, "w") as f:
             f.write(content)
@@ -114,35 +173,10 @@ def main():
     index = {
         "version": 1,
         "originalPath": "/Users/testuser/projects/myapp",
-        "entries": [
-            {
-                "sessionId": s1_id,
-                "fullPath": os.path.join(project_dir, f"{s1_id}.jsonl"),
-                "fileMtime": int(s1_start.timestamp() * 1000),
-                "firstPrompt": "How do I create a Python virtual environment?",
-                "summary": "Python venv setup help",
-                "messageCount": 4,
-                "created": s1_start.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
-                "modified": (s1_start + timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
-                "projectPath": "/Users/testuser/projects/myapp",
-                "isSidechain": False,
-            },
-            {
-                "sessionId": s2_id,
-                "fullPath": os.path.join(project_dir, f"{s2_id}.jsonl"),
-                "fileMtime": int(s2_start.timestamp() * 1000),
-                "firstPrompt": "Add a health check endpoint to my Flask app",
-                "summary": "Flask health check endpoint",
-                "messageCount": 4,
-                "created": s2_start.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
-                "modified": (s2_start + timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
-                "projectPath": "/Users/testuser/projects/myapp",
-                "isSidechain": False,
-            },
-        ],
+        "entries": entries,
     }
     with open(os.path.join(project_dir, "sessions-index.json"), "w") as f:
-        json.dump(index, f, indent=2)
+        f.write(json.dumps(index, indent=2))
 
     # Write stats-cache.json
     today = now.strftime("%Y-%m-%d")
@@ -164,17 +198,17 @@ def main():
                 "webSearchRequests": 0,
             },
         },
-        "totalSessions": 2,
-        "totalMessages": 8,
-        "longestSession": {"messageCount": 4},
+        "totalSessions": len(entries),
+        "totalMessages": sum(e["messageCount"] for e in entries),
+        "longestSession": {"messageCount": max(e["messageCount"] for e in entries)},
         "hourCounts": {str(h): (4 if h == now.hour else 0) for h in range(24)},
     }
     with open(os.path.join(CLAUDE_DIR, "stats-cache.json"), "w") as f:
-        json.dump(stats, f, indent=2)
+        f.write(json.dumps(stats, indent=2))
 
     print(f"Created fixture data at {CLAUDE_DIR}")
     print(f"  Project: {project_dir}")
-    print(f"  Sessions: {s1_id}, {s2_id}")
+    print(f"  Sessions: {s1_id}, {s2_id}" + (f" + {args.extra_sessions} synthetic" if args.extra_sessions else ""))
     print(f"  Stats: {os.path.join(CLAUDE_DIR, 'stats-cache.json')}")
 
 
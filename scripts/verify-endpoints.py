@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Verify all API endpoints respond correctly. Used by the Docker smoke test."""
 
+import http.client
 import json
 import subprocess
 import sys
@@ -8,44 +9,61 @@ import time
 import os
 import signal
 
-API_URL = "http://127.0.0.1:8000"
+API_HOST = "127.0.0.1"
+API_PORT = 8000
+
+# One keep-alive connection for every request; http.client reconnects
+# on the next request if the server closes it
+_conn = http.client.HTTPConnection(API_HOST, API_PORT, timeout=10)
+
+
+def _get(path: str) -> tuple[int, bytes]:
+    """GET path on the API, returning (status, body)."""
+    try:
+        _conn.request("GET", path)
+        resp = _conn.getresponse()
+        return resp.status, resp.read()
+    except (OSError, http.client.HTTPException):
+        _conn.close()
+        raise
 
 
 def fetch(path: str) -> dict:
-    """Fetch a JSON endpoint via curl."""
-    result = subprocess.run(
-        ["curl", "-sf", f"{API_URL}{path}"],
-        capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        print(f"FAIL: {path} — curl returned {result.returncode}")
+    """Fetch a JSON endpoint."""
+    try:
+        status, body = _get(path)
+    except (OSError, http.client.HTTPException) as e:
+        print(f"FAIL: {path} — {e}")
+        sys.exit(1)
+    if status >= 400:
+        print(f"FAIL: {path} — HTTP {status}")
         sys.exit(1)
-    return json.loads(result.stdout)
+    return json.loads(body)
 
 
 def main():
     # Start the API server
     print("Starting API server...")
     api = subprocess.Popen(
-        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "8000"],
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", API_HOST, "--port", str(API_PORT)],
         cwd=os.path.join(os.path.dirname(__file__), "..", "api"),
     )
 
     # Wait for API to be ready
+    # Poll every 0.1s (15s budget): a refused connect costs microseconds now
+    # that the probe is in-process, so a short interval just trims startup
     print("Waiting for API...", end="", flush=True)
-    for _ in range(30):
+    for attempt in range(150):
         try:
-            result = subprocess.run(
-                ["curl", "-sf", f"{API_URL}/health"],
-                capture_output=True, timeout=2,
-            )
-            if result.returncode == 0:
+            status, _body = _get("/health")
+            if status < 400:
                 print(" ready")
                 break
-        except subprocess.TimeoutExpired:
+        except (OSError, http.client.HTTPException):
             pass
-        print(".", end="", flush=True)
-        time.sleep(0.5)
+        if attempt % 5 == 4:
+            print(".", end="", flush=True)
+        time.sleep(0.1)
     else:
         print(" FAILED — API did not start")
         api.kill()
@@ -105,6 +123,7 @@ def main():
         failures += 1
 
     # Cleanup
+    _conn.close()
     api.terminate()
     try:
         api.wait(timeout=5)
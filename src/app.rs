@@ -3372,12 +3372,12 @@ impl DashboardApp {
                     if let Some(ref progress) = self.rescore_progress {
                         // Show progress bar and text
                         let fraction = if progress.total > 0 {
-                            (progress.current + 1) as f32 / progress.total as f32
+                            progress.current as f32 / progress.total as f32
                         } else {
                             0.0
                         };
                         ui.add(egui::ProgressBar::new(fraction)
-                            .text(format!("{}/{}", progress.current + 1, progress.total)));
+                            .text(format!("{}/{}", progress.current, progress.total)));
                         ui.label(format!("Session {}... ({} msgs)",
                             progress.session_id, progress.messages_so_far));
                     } else {